@@ -6,11 +6,21 @@ from pytgcalls.exceptions import NoActiveGroupCall
 
 import config
 from ShrutiMusic import LOGGER, app, userbot
+from ShrutiMusic.core.bus import bus
 from ShrutiMusic.core.call import Aviax
 from ShrutiMusic.misc import sudo
 from ShrutiMusic.plugins import ALL_MODULES
-from ShrutiMusic.utils.database import get_banned_users, get_gbanned
-from config import BANNED_USERS
+from ShrutiMusic.utils.database import (
+    ensure_indexes,
+    flags_refresher,
+    load_bans,
+    load_flags,
+    migrate_authusers,
+    migrate_chat_settings,
+    served_writer,
+    warm_chat_settings,
+)
+from ShrutiMusic.utils.stream import persist
 
 
 async def init():
@@ -23,16 +33,28 @@ async def init():
     ):
         LOGGER(__name__).error("Assistant client variables not defined, exiting...")
         exit()
+    await ensure_indexes()
     await sudo()
-    try:
-        users = await get_gbanned()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-        users = await get_banned_users()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-    except:
-        pass
+    migrated = await migrate_chat_settings()
+    if migrated:
+        LOGGER(__name__).info(f"Migrated the settings of {migrated} chats.")
+    migrated = await migrate_authusers()
+    if migrated:
+        LOGGER(__name__).info(f"Migrated the auth users of {migrated} chats.")
+    warmed = await warm_chat_settings()
+    LOGGER(__name__).info(f"Preloaded the settings of {warmed} chats.")
+    await load_flags()
+    # The ban lists are only checked in memory, so the bot must not start without them.
+    for attempt in range(1, 4):
+        try:
+            await load_bans()
+            break
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to load the ban lists ({attempt}/3): {e}")
+            await asyncio.sleep(5)
+    else:
+        LOGGER(__name__).error("Could not load the ban lists, exiting...")
+        exit()
     await app.start()
     for all_module in ALL_MODULES:
         importlib.import_module("ShrutiMusic.plugins" + all_module)
@@ -49,6 +71,10 @@ async def init():
     except:
         pass
     await Aviax.decorators()
+    asyncio.create_task(persist.start())
+    asyncio.create_task(served_writer())
+    asyncio.create_task(flags_refresher())
+    asyncio.create_task(bus.run())
     LOGGER("ShrutiMusic").info(
         "\x53\x68\x72\x75\x74\x69\x20\x4d\x75\x73\x69\x63\x20\x53\x74\x61\x72\x74\x65\x64\x20\x53\x75\x63\x63\x65\x73\x73\x66\x75\x6c\x6c\x79\x2e\x0a\x0a\x44\x6f\x6e\x27\x74\x20\x66\x6f\x72\x67\x65\x74\x20\x74\x6f\x20\x76\x69\x73\x69\x74\x20\x40\x53\x68\x72\x75\x74\x69\x42\x6f\x74\x73"
     )
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import time
+
+import psutil
+from pytgcalls.types.input_stream.quality import LowQualityVideo, MediumQualityVideo
+
+import config
+from ShrutiMusic import app
+from ShrutiMusic.logging import LOGGER
+from ShrutiMusic.utils.exceptions import AssistantErr
+
+NORMAL, QUEUE, DOWNGRADE, REFUSE = range(4)
+STAGES = ["ɴᴏʀᴍᴀʟ", "ǫᴜᴇᴜᴇ", "ᴅᴏᴡɴɢʀᴀᴅᴇ", "ʀᴇғᴜsᴇ"]
+
+# Seconds between two samples of the load.
+INTERVAL = 2
+# Samples below a stage needed before stepping down, so a short dip
+# does not flood the assistants with every queued join at once.
+COOLDOWN = 3
+# Queued joins released per sample below the refuse stage: joins are paced
+# while the load is high, and they start with low quality video from the
+# downgrade stage on.
+BURST = 3
+
+
+def _thresholds(value: str):
+    if not value:
+        return []
+    return sorted(float(x) for x in value.split(",") if x.strip())
+
+
+def _level(value: float, thresholds) -> int:
+    return sum(1 for x in thresholds if value >= x)
+
+
+class AdmissionControl:
+    def __init__(self):
+        self.cpu_limits = _thresholds(config.ADMISSION_CPU)
+        self.memory_limits = _thresholds(config.ADMISSION_MEMORY)
+        self.lag_limits = _thresholds(config.ADMISSION_LAG)
+        self.stage = NORMAL
+        self.cpu = 0.0
+        self.memory = 0.0
+        self.process_cpu = 0.0
+        self.process_memory = 0
+        self.lag = 0.0
+        self.waiting = []
+        self.admitted = 0
+        self.queued = 0
+        self.downgraded = 0
+        self.refused = 0
+        self._calm = 0
+        self._process = psutil.Process(os.getpid())
+        self._children = {}
+        self._task = None
+
+    def _sample_process(self):
+        cpu = self._process.cpu_percent(None)
+        memory = self._process.memory_info().rss
+        seen = {}
+        for child in self._process.children(recursive=True):
+            child = self._children.get(child.pid, child)
+            try:
+                cpu += child.cpu_percent(None)
+                memory += child.memory_info().rss
+            except psutil.Error:
+                continue
+            seen[child.pid] = child
+        self._children = seen
+        self.process_cpu = cpu / (psutil.cpu_count() or 1)
+        self.process_memory = memory
+
+    def _update(self):
+        self.cpu = psutil.cpu_percent(None)
+        self.memory = psutil.virtual_memory().percent
+        try:
+            self._sample_process()
+        except psutil.Error:
+            pass
+        stage = min(
+            max(
+                _level(self.cpu, self.cpu_limits),
+                _level(self.memory, self.memory_limits),
+                _level(self.lag, self.lag_limits),
+            ),
+            REFUSE,
+        )
+        if stage >= self.stage:
+            self._calm = 0
+            if stage != self.stage:
+                LOGGER(__name__).warning(
+                    f"Admission stage raised to {stage} (cpu {self.cpu}%, memory {self.memory}%, lag {round(self.lag)}ms)"
+                )
+            self.stage = stage
+            return
+        self._calm += 1
+        if self._calm >= COOLDOWN:
+            self._calm = 0
+            self.stage -= 1
+            LOGGER(__name__).info(f"Admission stage lowered to {self.stage}")
+
+    def _release(self):
+        if self.stage >= REFUSE:
+            return
+        for _ in range(min(BURST, len(self.waiting))):
+            waiter = self.waiting.pop(0)
+            if not waiter.done():
+                waiter.set_result(True)
+
+    async def monitor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(INTERVAL)
+            lag = max(0.0, (loop.time() - start - INTERVAL) * 1000)
+            self.lag = lag if lag > self.lag else (self.lag + lag) / 2
+            try:
+                self._update()
+            except Exception as e:
+                LOGGER(__name__).warning(f"Admission sample failed: {e}")
+            self._release()
+
+    def start(self):
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self.monitor())
+
+    def video_parameters(self):
+        if self.stage >= DOWNGRADE:
+            self.downgraded += 1
+            return LowQualityVideo()
+        return MediumQualityVideo()
+
+    async def admit(self, original_chat_id: int, _):
+        if self.stage >= REFUSE:
+            self.refused += 1
+            raise AssistantErr(_["call_12"])
+        if self.stage < QUEUE and not self.waiting:
+            self.admitted += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiting.append(waiter)
+        self.queued += 1
+        deadline = time.monotonic() + config.ADMISSION_WAIT
+        position = None
+        mystic = None
+        try:
+            while not waiter.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.refused += 1
+                    raise AssistantErr(_["call_12"])
+                current = self.waiting.index(waiter) + 1
+                if current != position:
+                    position = current
+                    try:
+                        if mystic:
+                            await mystic.edit_text(_["call_11"].format(position))
+                        else:
+                            mystic = await app.send_message(
+                                original_chat_id, _["call_11"].format(position)
+                            )
+                    except:
+                        pass
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(waiter), min(remaining, INTERVAL)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            self.admitted += 1
+        finally:
+            if waiter in self.waiting:
+                self.waiting.remove(waiter)
+            if mystic:
+                try:
+                    await mystic.delete()
+                except:
+                    pass
+
+    def status(self, _) -> str:
+        def limits(values, unit):
+            return "/".join(f"{round(x)}{unit}" for x in values) or "-"
+
+        return _["gstats_6"].format(
+            STAGES[self.stage],
+            self.cpu,
+            round(self.process_cpu, 1),
+            self.memory,
+            round(self.process_memory / 1024**2),
+            round(self.lag),
+            len(self.waiting),
+            self.admitted,
+            self.queued,
+            self.downgraded,
+            self.refused,
+            limits(self.cpu_limits, "%"),
+            limits(self.memory_limits, "%"),
+            limits(self.lag_limits, "ms"),
+        )
+
+
+admission = AdmissionControl()
@@ -0,0 +1,151 @@
+import asyncio
+import time
+import uuid
+
+from pymongo import ReturnDocument
+
+import config
+from ShrutiMusic.core.mongo import mongodb
+from ShrutiMusic.logging import LOGGER
+
+COUNTER = "invalidations"
+# Sequence numbers re-read behind the newest applied one: a number is taken
+# before its event is written, so a later event can be visible first.
+REPLAY = 32
+# Seconds an event is kept for the instances that poll.
+RETENTION = 3600
+
+
+class InvalidationBus:
+    """Tells the other processes sharing the database which cached keys changed.
+
+    Each change is written as an event numbered by a shared counter. Processes
+    follow the events with a change stream when the server supports one, and
+    otherwise poll the counter and read the events they have not applied.
+    Events are only hints: handlers evict or reload from the database.
+    """
+
+    def __init__(
+        self, events, counters, mode: str, interval: int, clock=time.time
+    ):
+        self.events = events
+        self.counters = counters
+        self.mode = mode
+        self.interval = interval
+        self.clock = clock
+        self.origin = uuid.uuid4().hex
+        self.handlers = {}
+        self.floor = 0
+        self.applied = 0
+        self.seen = set()
+
+    def register(self, scope: str, handler):
+        self.handlers[scope] = handler
+
+    async def publish(self, scope: str, key=None):
+        if self.mode == "off":
+            return
+        try:
+            counter = await self.counters.find_one_and_update(
+                {"_id": COUNTER},
+                {"$inc": {"seq": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            await self.events.insert_one(
+                {
+                    "seq": counter["seq"],
+                    "scope": scope,
+                    "key": key,
+                    "origin": self.origin,
+                    "at": self.clock(),
+                }
+            )
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"Failed to publish the {scope} change of {key}: {e}"
+            )
+
+    async def _apply(self, event: dict):
+        seq = event.get("seq", 0)
+        if seq in self.seen:
+            return
+        self.seen.add(seq)
+        self.applied = max(self.applied, seq)
+        if len(self.seen) > REPLAY * 4:
+            self.seen = {seq for seq in self.seen if seq > self.applied - REPLAY}
+        if event.get("origin") == self.origin:
+            return
+        handler = self.handlers.get(event.get("scope"))
+        if handler is None:
+            return
+        try:
+            await handler(event.get("key"))
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"Failed to apply the {event.get('scope')} change: {e}"
+            )
+
+    async def _version(self) -> int:
+        counter = await self.counters.find_one({"_id": COUNTER})
+        return (counter or {}).get("seq", 0)
+
+    def _missing(self) -> bool:
+        start = max(self.floor, self.applied - REPLAY)
+        return any(
+            seq not in self.seen for seq in range(start + 1, self.applied + 1)
+        )
+
+    async def poll(self):
+        version = await self._version()
+        if version == self.applied and not self._missing():
+            return
+        start = max(self.floor, self.applied - REPLAY)
+        events = [
+            event async for event in self.events.find({"seq": {"$gt": start}})
+        ]
+        for event in sorted(events, key=lambda x: x.get("seq", 0)):
+            await self._apply(event)
+
+    async def pruner(self):
+        # Runs next to the change stream as well as the polling.
+        while not await asyncio.sleep(RETENTION / 10):
+            try:
+                await self.events.delete_many({"at": {"$lt": self.clock() - RETENTION}})
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to prune cache invalidations: {e}")
+
+    async def watch(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        async with self.events.watch(pipeline) as stream:
+            LOGGER(__name__).info("Following cache invalidations by change stream.")
+            async for change in stream:
+                await self._apply(change["fullDocument"])
+
+    async def run(self):
+        if self.mode == "off":
+            return
+        try:
+            await self.events.create_index("seq", unique=True)
+            self.floor = self.applied = await self._version()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to start the invalidation bus: {e}")
+        asyncio.create_task(self.pruner())
+        if self.mode == "auto":
+            try:
+                await self.watch()
+            except Exception as e:
+                LOGGER(__name__).info(f"No change stream ({e}), polling instead.")
+        while not await asyncio.sleep(self.interval):
+            try:
+                await self.poll()
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to poll cache invalidations: {e}")
+
+
+bus = InvalidationBus(
+    mongodb.invalidations,
+    mongodb.counters,
+    config.CACHE_BUS,
+    config.CACHE_BUS_INTERVAL,
+)
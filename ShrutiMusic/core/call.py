@@ -12,12 +12,20 @@ from pytgcalls.exceptions import (
     TelegramServerError,
 )
 from pytgcalls.types import Update
-from pytgcalls.types.input_stream import AudioPiped, AudioVideoPiped
-from pytgcalls.types.input_stream.quality import HighQualityAudio, MediumQualityVideo
+from pytgcalls.types.input_stream import (
+    AudioPiped,
+    AudioVideoPiped,
+    InputAudioStream,
+    InputStream,
+)
+from pytgcalls.types.input_stream.quality import HighQualityAudio
 from pytgcalls.types.stream import StreamAudioEnded
 
 import config
 from ShrutiMusic import LOGGER, YouTube, app
+from ShrutiMusic.core.admission import admission
+from ShrutiMusic.core.radio import station_of
+from ShrutiMusic.core.session import sessions
 from ShrutiMusic.misc import db
 from ShrutiMusic.utils.database import (
     add_active_chat,
@@ -27,25 +35,27 @@ from ShrutiMusic.utils.database import (
     group_assistant,
     is_autoend,
     music_on,
-    remove_active_chat,
-    remove_active_video_chat,
     set_loop,
 )
 from ShrutiMusic.utils.exceptions import AssistantErr
 from ShrutiMusic.utils.formatters import check_duration, seconds_to_min, speed_converter
 from ShrutiMusic.utils.inline.play import stream_markup
 from ShrutiMusic.utils.stream.autoclear import auto_clean
+from ShrutiMusic.utils.stream.source import cached_source, remember_source
+from ShrutiMusic.utils.stream.transcode import audio_stream, register_play
 from ShrutiMusic.utils.thumbnails import gen_thumb
 from strings import get_string
 
-autoend = {}
-counter = {}
+seeks = {}
+
+# Seconds to wait for further /seek commands before re-piping the stream.
+SEEK_DEBOUNCE = 0.6
 
 
 async def _clear_(chat_id):
-    db[chat_id] = []
-    await remove_active_video_chat(chat_id)
-    await remove_active_chat(chat_id)
+    for track in db.get(chat_id) or []:
+        await auto_clean(track)
+    sessions.close(chat_id)
 
 
 class Call(PyTgCalls):
@@ -111,6 +121,9 @@ class Call(PyTgCalls):
 
     async def stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
+        station = station_of(chat_id)
+        if station:
+            station.unsubscribe(chat_id)
         try:
             await _clear_(chat_id)
             await assistant.leave_group_call(chat_id)
@@ -192,15 +205,11 @@ class Call(PyTgCalls):
             AudioVideoPiped(
                 out,
                 audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
+                video_parameters=admission.video_parameters(),
                 additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
             )
             if playing[0]["streamtype"] == "video"
-            else AudioPiped(
-                out,
-                audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
-            )
+            else audio_stream(out, f"-ss {played} -to {duration}")
         )
         if str(db[chat_id][0]["file"]) == str(file_path):
             await assistant.change_stream(chat_id, stream)
@@ -219,13 +228,7 @@ class Call(PyTgCalls):
 
     async def force_stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
-        try:
-            check = db.get(chat_id)
-            check.pop(0)
-        except:
-            pass
-        await remove_active_video_chat(chat_id)
-        await remove_active_chat(chat_id)
+        await _clear_(chat_id)
         try:
             await assistant.leave_group_call(chat_id)
         except:
@@ -243,10 +246,11 @@ class Call(PyTgCalls):
             stream = AudioVideoPiped(
                 link,
                 audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
+                video_parameters=admission.video_parameters(),
             )
         else:
-            stream = AudioPiped(link, audio_parameters=HighQualityAudio())
+            register_play(link)
+            stream = audio_stream(link)
         await assistant.change_stream(
             chat_id,
             stream,
@@ -258,18 +262,63 @@ class Call(PyTgCalls):
             AudioVideoPiped(
                 file_path,
                 audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
+                video_parameters=admission.video_parameters(),
                 additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
             )
             if mode == "video"
-            else AudioPiped(
-                file_path,
-                audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
+            else audio_stream(file_path, f"-ss {to_seek} -to {duration}")
         )
         await assistant.change_stream(chat_id, stream)
 
+    async def rejoin_stream(self, chat_id, source, played, duration, video):
+        assistant = await group_assistant(self, chat_id)
+        params = f"-ss {seconds_to_min(played)} -to {duration}" if played else ""
+        if video:
+            stream = AudioVideoPiped(
+                source,
+                audio_parameters=HighQualityAudio(),
+                video_parameters=admission.video_parameters(),
+                additional_ffmpeg_parameters=params,
+            )
+        else:
+            stream = audio_stream(source, params)
+        try:
+            await assistant.join_group_call(
+                chat_id,
+                stream,
+                stream_type=StreamType().pulse_stream,
+            )
+        except AlreadyJoinedError:
+            # The assistant never left the call, only the stream is replaced.
+            await assistant.change_stream(chat_id, stream)
+        await add_active_chat(chat_id)
+        await music_on(chat_id)
+        if video:
+            await add_active_video_chat(chat_id)
+
+    async def debounced_seek(self, chat_id, file_path, to_seek, duration, mode):
+        pending = seeks.get(chat_id)
+        if pending:
+            pending[0] = (file_path, to_seek, duration, mode)
+            return await asyncio.shield(pending[1])
+        waiter = asyncio.get_running_loop().create_future()
+        seeks[chat_id] = [(file_path, to_seek, duration, mode), waiter]
+        result = None
+        try:
+            await asyncio.sleep(SEEK_DEBOUNCE)
+            args = seeks.pop(chat_id)[0]
+            try:
+                await self.seek_stream(chat_id, *args)
+                result = args[1]
+            except Exception as e:
+                LOGGER(__name__).warning(f"Seek failed in {chat_id}: {e}")
+        finally:
+            if chat_id in seeks and seeks[chat_id][1] is waiter:
+                seeks.pop(chat_id)
+            if not waiter.done():
+                waiter.set_result(result)
+        return result
+
     async def stream_call(self, link):
         assistant = await group_assistant(self, config.LOG_GROUP_ID)
         await assistant.join_group_call(
@@ -280,6 +329,33 @@ class Call(PyTgCalls):
         await asyncio.sleep(0.2)
         await assistant.leave_group_call(config.LOG_GROUP_ID)
 
+    async def join_radio(self, chat_id: int, station):
+        assistant = await group_assistant(self, chat_id)
+        language = await get_lang(chat_id)
+        _ = get_string(language)
+        path = station.subscribe(chat_id)
+        try:
+            await assistant.join_group_call(
+                chat_id,
+                InputStream(InputAudioStream(path, HighQualityAudio())),
+                stream_type=StreamType().pulse_stream,
+            )
+        except NoActiveGroupCall:
+            station.unsubscribe(chat_id)
+            raise AssistantErr(_["call_8"])
+        except AlreadyJoinedError:
+            station.unsubscribe(chat_id)
+            raise AssistantErr(_["call_9"])
+        except TelegramServerError:
+            station.unsubscribe(chat_id)
+            raise AssistantErr(_["call_10"])
+        except Exception:
+            station.unsubscribe(chat_id)
+            raise
+        db[chat_id] = []
+        await add_active_chat(chat_id)
+        await music_on(chat_id)
+
     async def join_call(
         self,
         chat_id: int,
@@ -291,22 +367,16 @@ class Call(PyTgCalls):
         assistant = await group_assistant(self, chat_id)
         language = await get_lang(chat_id)
         _ = get_string(language)
+        await admission.admit(original_chat_id, _)
         if video:
             stream = AudioVideoPiped(
                 link,
                 audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
+                video_parameters=admission.video_parameters(),
             )
         else:
-            stream = (
-                AudioVideoPiped(
-                    link,
-                    audio_parameters=HighQualityAudio(),
-                    video_parameters=MediumQualityVideo(),
-                )
-                if video
-                else AudioPiped(link, audio_parameters=HighQualityAudio())
-            )
+            register_play(link)
+            stream = audio_stream(link)
         try:
             await assistant.join_group_call(
                 chat_id,
@@ -324,10 +394,39 @@ class Call(PyTgCalls):
         if video:
             await add_active_video_chat(chat_id)
         if await is_autoend():
-            counter[chat_id] = {}
+            session = sessions.open(chat_id)
+            session.counter = {}
             users = len(await assistant.get_participants(chat_id))
             if users == 1:
-                autoend[chat_id] = datetime.now() + timedelta(minutes=1)
+                session.autoend = datetime.now() + timedelta(minutes=1)
+
+    async def replay_stream(self, client, chat_id, video):
+        track = db[chat_id][0]
+        queued = track["file"]
+        if "live_" in queued:
+            return False
+        if "index_" in queued:
+            source = track["vidid"]
+        elif "vid_" in queued:
+            source = cached_source(track)
+        else:
+            source = queued
+        if not source or not track.get("mystic"):
+            return False
+        if video:
+            stream = AudioVideoPiped(
+                source,
+                audio_parameters=HighQualityAudio(),
+                video_parameters=admission.video_parameters(),
+            )
+        else:
+            register_play(source)
+            stream = audio_stream(source)
+        try:
+            await client.change_stream(chat_id, stream)
+        except:
+            return False
+        return True
 
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
@@ -366,6 +465,8 @@ class Call(PyTgCalls):
                 db[chat_id][0]["speed_path"] = None
                 db[chat_id][0]["speed"] = 1.0
             video = True if str(streamtype) == "video" else False
+            if popped is None and await self.replay_stream(client, chat_id, video):
+                return
             if "live_" in queued:
                 n, link = await YouTube.video(videoid, True)
                 if n == 0:
@@ -377,7 +478,7 @@ class Call(PyTgCalls):
                     stream = AudioVideoPiped(
                         link,
                         audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
+                        video_parameters=admission.video_parameters(),
                     )
                 else:
                     stream = AudioPiped(
@@ -423,13 +524,11 @@ class Call(PyTgCalls):
                     stream = AudioVideoPiped(
                         file_path,
                         audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
+                        video_parameters=admission.video_parameters(),
                     )
                 else:
-                    stream = AudioPiped(
-                        file_path,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                    register_play(file_path)
+                    stream = audio_stream(file_path)
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
@@ -453,12 +552,13 @@ class Call(PyTgCalls):
                 )
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "stream"
+                remember_source(db[chat_id][0], file_path)
             elif "index_" in queued:
                 stream = (
                     AudioVideoPiped(
                         videoid,
                         audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
+                        video_parameters=admission.video_parameters(),
                     )
                     if str(streamtype) == "video"
                     else AudioPiped(videoid, audio_parameters=HighQualityAudio())
@@ -484,13 +584,11 @@ class Call(PyTgCalls):
                     stream = AudioVideoPiped(
                         queued,
                         audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
+                        video_parameters=admission.video_parameters(),
                     )
                 else:
-                    stream = AudioPiped(
-                        queued,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                    register_play(queued)
+                    stream = audio_stream(queued)
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
@@ -557,6 +655,7 @@ class Call(PyTgCalls):
 
     async def start(self):
         LOGGER(__name__).info("Starting PyTgCalls Client...\n")
+        admission.start()
         if config.STRING1:
             await self.one.start()
         if config.STRING2:
@@ -595,6 +694,8 @@ class Call(PyTgCalls):
         async def stream_end_handler1(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
+            if station_of(update.chat_id):
+                return
             await self.change_stream(client, update.chat_id)
 
 
@@ -0,0 +1,194 @@
+import time
+from collections import deque
+
+import config
+from ShrutiMusic.logging import LOGGER
+
+# Latest calls kept per operation to compute the percentiles.
+SAMPLES = 1024
+
+# Collection methods that are awaited; find() is timed through its cursor.
+TIMED = frozenset(
+    {
+        "find_one",
+        "count_documents",
+        "estimated_document_count",
+        "insert_one",
+        "insert_many",
+        "update_one",
+        "update_many",
+        "replace_one",
+        "find_one_and_update",
+        "find_one_and_delete",
+        "delete_one",
+        "delete_many",
+        "bulk_write",
+        "create_index",
+        "distinct",
+    }
+)
+
+
+class OpStats:
+    __slots__ = ("count", "errors", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class DBMetrics:
+    def __init__(self, slow_ms: int, clock=time.perf_counter):
+        self.slow_ms = slow_ms
+        self.clock = clock
+        self.ops = {}
+        self.since = time.time()
+
+    def record(
+        self, collection: str, op: str, elapsed: float, query=None, failed=False
+    ):
+        stats = self.ops.get((collection, op))
+        if stats is None:
+            stats = self.ops[(collection, op)] = OpStats()
+        stats.count += 1
+        stats.errors += failed
+        stats.total += elapsed
+        stats.samples.append(elapsed)
+        if self.slow_ms and elapsed * 1000 >= self.slow_ms:
+            LOGGER(__name__).warning(
+                f"Slow query {collection}.{op} took {elapsed * 1000:.0f}ms: {query}"
+            )
+
+    def by_collection(self) -> dict:
+        totals = {}
+        for (collection, _), stats in self.ops.items():
+            count, total = totals.get(collection, (0, 0.0))
+            totals[collection] = (count + stats.count, total + stats.total)
+        return totals
+
+    def reset(self):
+        self.ops.clear()
+        self.since = time.time()
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor, metrics: DBMetrics, collection: str, query):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._collection = collection
+        self._query = query
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _iterate(self):
+        clock = self._metrics.clock
+        elapsed = 0.0
+        failed = False
+        docs = self._cursor.__aiter__()
+        try:
+            while True:
+                start = clock()
+                try:
+                    doc = await docs.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    elapsed += clock() - start
+                yield doc
+        finally:
+            self._metrics.record(
+                self._collection, "find", elapsed, self._query, failed
+            )
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def to_list(self, length=None):
+        docs = []
+        async for doc in self:
+            docs.append(doc)
+            if length and len(docs) >= length:
+                break
+        return docs
+
+
+class InstrumentedCollection:
+    def __init__(self, collection, metrics: DBMetrics):
+        self._collection = collection
+        self._metrics = metrics
+        self.name = collection.name
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in TIMED:
+            return attr
+
+        async def timed(*args, **kwargs):
+            clock = self._metrics.clock
+            start = clock()
+            failed = False
+            try:
+                return await attr(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                query = args[0] if args and name != "bulk_write" else None
+                self._metrics.record(self.name, name, clock() - start, query, failed)
+
+        return timed
+
+    def find(self, *args, **kwargs):
+        cursor = self._collection.find(*args, **kwargs)
+        query = args[0] if args else kwargs.get("filter")
+        return InstrumentedCursor(cursor, self._metrics, self.name, query)
+
+
+class InstrumentedDatabase:
+    """Proxy of a database recording the count and latency of every call."""
+
+    def __init__(self, database, metrics: DBMetrics):
+        self._database = database
+        self._collections = {}
+        self.metrics = metrics
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(
+                self._database[name], self.metrics
+            )
+        return collection
+
+    async def command(self, *args, **kwargs):
+        start = self.metrics.clock()
+        failed = False
+        try:
+            return await self._database.command(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.record(
+                "$cmd", "command", self.metrics.clock() - start, args, failed
+            )
+
+
+dbmetrics = DBMetrics(config.DB_SLOW_QUERY_MS)
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import time
+
+from ShrutiMusic.core.mongo import mongodb
+
+MARKER = "handoff"
+# Seconds between two checks of the marker while waiting for the new process.
+POLL = 1
+
+
+class Handoff:
+    """Marker document exchanged between the old and the new process.
+
+    The store, the clock and the sleep are injectable to run it against
+    stand-ins.
+    """
+
+    def __init__(self, collection, clock=time.time, sleep=asyncio.sleep):
+        self.collection = collection
+        self.clock = clock
+        self.sleep = sleep
+        self.draining = False
+
+    async def request(self):
+        self.draining = True
+        await self.collection.update_one(
+            {"_id": MARKER},
+            {
+                "$set": {
+                    "state": "requested",
+                    "pid": os.getpid(),
+                    "at": self.clock(),
+                    "resumed": 0,
+                }
+            },
+            upsert=True,
+        )
+
+    async def pending(self, timeout: int):
+        marker = await self.collection.find_one({"_id": MARKER})
+        if not marker or marker.get("state") != "requested":
+            return None
+        if self.clock() - marker.get("at", 0) > timeout:
+            return None
+        return marker
+
+    async def complete(self, resumed: int):
+        await self.collection.update_one(
+            {"_id": MARKER, "state": "requested"},
+            {"$set": {"state": "taken", "resumed": resumed, "by": os.getpid()}},
+        )
+
+    async def cancel(self):
+        self.draining = False
+        await self.collection.delete_one({"_id": MARKER})
+
+    async def wait(self, timeout: int):
+        deadline = self.clock() + timeout
+        while self.clock() < deadline:
+            marker = await self.collection.find_one({"_id": MARKER})
+            if marker and marker.get("state") == "taken":
+                await self.collection.delete_one({"_id": MARKER})
+                return marker
+            await self.sleep(POLL)
+        return None
+
+
+handoff = Handoff(mongodb.handoff)
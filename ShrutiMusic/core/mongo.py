@@ -1,14 +1,28 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-
-from config import MONGO_DB_URI
+from config import DATABASE_BACKEND, MONGO_DB_URI, SQLITE_PATH
 
 from ..logging import LOGGER
+from .dbmetrics import InstrumentedDatabase, dbmetrics
+
+if DATABASE_BACKEND == "sqlite":
+    from .sqlite import SQLiteDatabase
+
+    LOGGER(__name__).info(f"Opening the SQLite database at {SQLITE_PATH}...")
+    try:
+        mongodb = SQLiteDatabase(SQLITE_PATH)
+        LOGGER(__name__).info("Opened the SQLite database.")
+    except Exception:
+        LOGGER(__name__).error("Failed to open the SQLite database.")
+        exit()
+else:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    LOGGER(__name__).info("Connecting to your Mongo Database...")
+    try:
+        _mongo_async_ = AsyncIOMotorClient(MONGO_DB_URI)
+        mongodb = _mongo_async_.Yukki
+        LOGGER(__name__).info("Connected to your Mongo Database.")
+    except:
+        LOGGER(__name__).error("Failed to connect to your Mongo Database.")
+        exit()
 
-LOGGER(__name__).info("Connecting to your Mongo Database...")
-try:
-    _mongo_async_ = AsyncIOMotorClient(MONGO_DB_URI)
-    mongodb = _mongo_async_.Yukki
-    LOGGER(__name__).info("Connected to your Mongo Database.")
-except:
-    LOGGER(__name__).error("Failed to connect to your Mongo Database.")
-    exit()
+mongodb = InstrumentedDatabase(mongodb, dbmetrics)
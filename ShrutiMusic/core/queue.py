@@ -0,0 +1,110 @@
+import random
+from collections import deque
+from typing import NamedTuple
+
+
+class MessageRef(NamedTuple):
+    chat_id: int
+    id: int
+
+    @classmethod
+    def of(cls, message):
+        if message is None or isinstance(message, cls):
+            return message
+        if isinstance(message, (list, tuple)):
+            return cls(*message)
+        return cls(message.chat.id, message.id)
+
+    async def delete(self):
+        from ShrutiMusic import app
+
+        return await app.delete_messages(self.chat_id, self.id)
+
+    async def edit_text(self, text, **kwargs):
+        from ShrutiMusic import app
+
+        return await app.edit_message_text(self.chat_id, self.id, text, **kwargs)
+
+    async def edit_reply_markup(self, reply_markup=None):
+        from ShrutiMusic import app
+
+        return await app.edit_message_reply_markup(self.chat_id, self.id, reply_markup)
+
+
+class Track:
+    __slots__ = (
+        "title",
+        "dur",
+        "streamtype",
+        "by",
+        "user_id",
+        "chat_id",
+        "file",
+        "vidid",
+        "seconds",
+        "played",
+        "mystic",
+        "markup",
+        "old_dur",
+        "old_second",
+        "speed_path",
+        "speed",
+        "resolved",
+        "expires",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.played = 0
+        for name, value in fields.items():
+            self[name] = value
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def __setitem__(self, name, value):
+        if name == "mystic":
+            value = MessageRef.of(value)
+        try:
+            setattr(self, name, value)
+        except AttributeError:
+            raise KeyError(name)
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if getattr(self, name) is not None
+        }
+
+
+class TrackQueue(deque):
+    __slots__ = ()
+
+    def pop(self, index: int = -1):
+        if index == 0:
+            return self.popleft()
+        if index == -1:
+            return super().pop()
+        track = self[index]
+        del self[index]
+        return track
+
+    def skip(self, count: int) -> list:
+        count = min(count, len(self))
+        return [self.popleft() for _ in range(count)]
+
+    def shuffle(self, keep_head: bool = True):
+        head = [self.popleft()] if keep_head and self else []
+        rest = list(self)
+        random.shuffle(rest)
+        self.clear()
+        self.extend(head + rest)
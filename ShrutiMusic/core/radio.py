@@ -0,0 +1,148 @@
+import asyncio
+import os
+
+from ShrutiMusic.logging import LOGGER
+from ShrutiMusic.utils.stream.autoclear import auto_clean
+from ShrutiMusic.utils.stream.transcode import RAW_INPUT, get_transcoded
+
+# 20ms of mono s16le at 48 kHz, small enough for an atomic pipe write
+FRAME = 1920
+SILENCE = bytes(FRAME)
+RADIO_DIR = os.path.join(os.getcwd(), "radio")
+
+stations = {}
+listeners = {}
+
+
+class Station:
+    def __init__(self, name: str):
+        self.name = name
+        self.queue = []
+        self.current = None
+        self.subscribers = {}
+        self.on_track = None
+        self._proc = None
+        self._task = None
+
+    def fifo(self, chat_id: int) -> str:
+        return os.path.join(RADIO_DIR, self.name, f"{chat_id}.pcm")
+
+    def subscribe(self, chat_id: int) -> str:
+        path = self.fifo(chat_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+        os.mkfifo(path)
+        self.subscribers[chat_id] = None
+        listeners[chat_id] = self.name
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return path
+
+    def unsubscribe(self, chat_id: int):
+        listeners.pop(chat_id, None)
+        fd = self.subscribers.pop(chat_id, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        try:
+            os.remove(self.fifo(chat_id))
+        except OSError:
+            pass
+        if not self.subscribers:
+            self.stop()
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._kill()
+        self.current = None
+
+    def skip(self):
+        self._kill()
+
+    def _kill(self):
+        if self._proc and self._proc.returncode is None:
+            try:
+                self._proc.kill()
+            except ProcessLookupError:
+                pass
+
+    def _write(self, frame: bytes):
+        for chat_id, fd in list(self.subscribers.items()):
+            if fd is None:
+                try:
+                    fd = os.open(self.fifo(chat_id), os.O_WRONLY | os.O_NONBLOCK)
+                except OSError:
+                    continue
+                self.subscribers[chat_id] = fd
+            try:
+                os.write(fd, frame)
+            except BlockingIOError:
+                # The listener is lagging behind, it loses this frame only.
+                continue
+            except OSError:
+                os.close(fd)
+                self.subscribers[chat_id] = None
+
+    async def _decode(self, path: str):
+        raw = get_transcoded(path)
+        source = [*RAW_INPUT.split(), "-i", raw] if raw else ["-i", path]
+        self._proc = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-re",
+            *source,
+            *RAW_INPUT.split(),
+            "pipe:1",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                try:
+                    frame = await self._proc.stdout.readexactly(FRAME)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        self._write(e.partial + bytes(FRAME - len(e.partial)))
+                    break
+                self._write(frame)
+        finally:
+            self._kill()
+            await self._proc.wait()
+
+    async def _run(self):
+        while self.subscribers:
+            if not self.queue:
+                self.current = None
+                self._write(SILENCE)
+                await asyncio.sleep(FRAME / 96000)
+                continue
+            self.current = self.queue.pop(0)
+            if self.on_track:
+                asyncio.create_task(self.on_track(self, self.current))
+            try:
+                await self._decode(self.current["file"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER(__name__).warning(f"Radio {self.name} failed to decode: {e}")
+            await auto_clean(self.current)
+
+
+def get_station(name: str, create: bool = False):
+    name = name.lower()
+    station = stations.get(name)
+    if not station and create:
+        station = stations[name] = Station(name)
+    return station
+
+
+def station_of(chat_id: int):
+    name = listeners.get(chat_id)
+    if name:
+        return stations.get(name)
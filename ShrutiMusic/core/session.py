@@ -0,0 +1,209 @@
+import time
+
+from ShrutiMusic.core.queue import TrackQueue
+
+
+class ChatSession:
+    __slots__ = (
+        "chat_id",
+        "queue",
+        "playing",
+        "loop",
+        "active",
+        "video",
+        "assistant",
+        "started",
+        "autoend",
+        "counter",
+        "votes",
+        "upvoters",
+        "confirmer",
+    )
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.queue = TrackQueue()
+        self.playing = False
+        self.loop = 0
+        self.active = False
+        self.video = False
+        self.assistant = None
+        self.started = None
+        # Deadline after which the assistant leaves an empty call.
+        self.autoend = None
+        self.counter = {}
+        # Upvote state keyed by the id of the vote message.
+        self.votes = {}
+        self.upvoters = {}
+        self.confirmer = {}
+
+    @property
+    def elapsed(self) -> int:
+        if not self.started:
+            return 0
+        return int(time.monotonic() - self.started)
+
+    def clear(self):
+        self.queue = TrackQueue()
+        self.playing = False
+        self.loop = 0
+        self.active = False
+        self.video = False
+        self.assistant = None
+        self.started = None
+        self.autoend = None
+        self.counter.clear()
+        self.votes.clear()
+        self.upvoters.clear()
+        self.confirmer.clear()
+
+
+class SessionRegistry:
+    """Sessions by chat, with the active calls indexed by video flag and by
+    assistant. ``active``, ``video`` and ``assistant`` of a session are only
+    changed through ``activate``, ``set_video``, ``deactivate`` and ``close``."""
+
+    __slots__ = ("_sessions", "_active", "_video", "_assistants", "queues")
+
+    def __init__(self):
+        self._sessions = {}
+        self._active = {}
+        self._video = set()
+        self._assistants = {}
+        self.queues = QueueView(self)
+
+    def get(self, chat_id: int):
+        return self._sessions.get(chat_id)
+
+    def open(self, chat_id: int) -> ChatSession:
+        session = self._sessions.get(chat_id)
+        if session is None:
+            session = self._sessions[chat_id] = ChatSession(chat_id)
+        return session
+
+    def close(self, chat_id: int):
+        session = self._sessions.pop(chat_id, None)
+        if session is not None:
+            self._deactivate(session)
+            session.clear()
+        return session
+
+    def activate(self, chat_id: int, assistant: int = None) -> ChatSession:
+        session = self.open(chat_id)
+        if session.active:
+            if assistant is None or assistant == session.assistant:
+                return session
+            self._assistants[session.assistant].discard(chat_id)
+        else:
+            session.active = True
+            session.started = time.monotonic()
+            self._active[chat_id] = session
+        session.assistant = assistant
+        self._assistants.setdefault(assistant, set()).add(chat_id)
+        return session
+
+    def deactivate(self, chat_id: int):
+        # Only drops the chat from the active calls; the queue is left alone.
+        session = self.get(chat_id)
+        if session is None:
+            return
+        self._deactivate(session)
+        session.active = False
+        session.video = False
+        session.assistant = None
+        session.started = None
+
+    def set_video(self, chat_id: int, video: bool):
+        session = self.open(chat_id) if video else self.get(chat_id)
+        if session is None:
+            return
+        session.video = video
+        if video:
+            self._video.add(chat_id)
+        else:
+            self._video.discard(chat_id)
+
+    def _deactivate(self, session: ChatSession):
+        chat_id = session.chat_id
+        self._video.discard(chat_id)
+        if self._active.pop(chat_id, None) is None:
+            return
+        chats = self._assistants.get(session.assistant)
+        if chats is not None:
+            chats.discard(chat_id)
+            if not chats:
+                del self._assistants[session.assistant]
+
+    def is_active(self, chat_id: int) -> bool:
+        return chat_id in self._active
+
+    def is_video(self, chat_id: int) -> bool:
+        return chat_id in self._video
+
+    def active(self, video: bool = False) -> list:
+        return list(self._video if video else self._active)
+
+    def count(self, video: bool = False) -> int:
+        return len(self._video if video else self._active)
+
+    def on_assistant(self, assistant: int) -> list:
+        return list(self._assistants.get(assistant, ()))
+
+    def load(self) -> dict:
+        """Number of active calls per assistant number."""
+        return {
+            assistant: len(chats)
+            for assistant, chats in self._assistants.items()
+            if assistant is not None
+        }
+
+    def values(self):
+        return list(self._sessions.values())
+
+    def __contains__(self, chat_id):
+        return chat_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class QueueView:
+    """Mapping of chat id to queue, kept for code written against ``misc.db``."""
+
+    __slots__ = ("_registry",)
+
+    def __init__(self, registry: SessionRegistry):
+        self._registry = registry
+
+    def get(self, chat_id: int, default=None):
+        session = self._registry.get(chat_id)
+        if session is None:
+            return default
+        return session.queue
+
+    def __getitem__(self, chat_id: int):
+        session = self._registry.get(chat_id)
+        if session is None:
+            raise KeyError(chat_id)
+        return session.queue
+
+    def __setitem__(self, chat_id: int, queue):
+        from ShrutiMusic.utils.stream.autoclear import release_track
+
+        if not isinstance(queue, TrackQueue):
+            queue = TrackQueue(queue)
+        session = self._registry.open(chat_id)
+        if session.queue is not queue:
+            # The replaced tracks no longer hold their files.
+            for track in session.queue:
+                release_track(track)
+        session.queue = queue
+
+    def __contains__(self, chat_id):
+        return chat_id in self._registry
+
+    def __len__(self):
+        return len(self._registry)
+
+
+sessions = SessionRegistry()
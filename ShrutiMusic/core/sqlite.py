@@ -0,0 +1,473 @@
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from pymongo import DeleteOne, ReturnDocument, UpdateOne
+
+_COMPARE = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+class InsertOneResult(NamedTuple):
+    inserted_id: object
+
+
+class UpdateResult(NamedTuple):
+    matched_count: int
+    modified_count: int
+    upserted_id: object
+
+
+class DeleteResult(NamedTuple):
+    deleted_count: int
+
+
+class BulkWriteResult(NamedTuple):
+    matched_count: int
+    modified_count: int
+    upserted_count: int
+    deleted_count: int
+
+
+def _path(field: str) -> str:
+    return "$" + "".join(f'."{part}"' for part in field.split("."))
+
+
+def _expr(field: str) -> str:
+    return f"json_extract(doc, '{_path(field)}')"
+
+
+def _key(value) -> str:
+    return json.dumps(value)
+
+
+def _param(value):
+    if isinstance(value, bool):
+        return int(value)
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    raise NotImplementedError(f"Unsupported filter value: {value!r}")
+
+
+def _where(query: dict):
+    clauses = []
+    params = []
+    for field, cond in (query or {}).items():
+        if field.startswith("$"):
+            raise NotImplementedError(f"Unsupported filter operator: {field}")
+        if field == "_id" and not isinstance(cond, dict):
+            clauses.append("id = ?")
+            params.append(_key(cond))
+        elif isinstance(cond, dict):
+            for op, value in cond.items():
+                if op == "$exists":
+                    negate = "NOT " if value else ""
+                    clauses.append(f"json_type(doc, '{_path(field)}') IS {negate}NULL")
+                elif op in _COMPARE:
+                    clauses.append(f"{_expr(field)} {_COMPARE[op]} ?")
+                    params.append(_param(value))
+                else:
+                    raise NotImplementedError(f"Unsupported filter operator: {op}")
+        elif cond is None:
+            clauses.append(f"{_expr(field)} IS NULL")
+        else:
+            clauses.append(f"{_expr(field)} = ?")
+            params.append(_param(cond))
+    return " AND ".join(clauses) or "1", params
+
+
+def _parent(doc: dict, field: str, create: bool):
+    parts = field.split(".")
+    for part in parts[:-1]:
+        child = doc.get(part)
+        if not isinstance(child, dict):
+            if not create:
+                return None, parts[-1]
+            child = doc[part] = {}
+        doc = child
+    return doc, parts[-1]
+
+
+def _apply(doc: dict, update: dict, inserting: bool):
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for field, value in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                parent, key = _parent(doc, field, True)
+                parent[key] = value
+            elif op == "$inc":
+                parent, key = _parent(doc, field, True)
+                parent[key] = parent.get(key, 0) + value
+            elif op == "$unset":
+                parent, key = _parent(doc, field, False)
+                if parent is not None:
+                    parent.pop(key, None)
+            elif op == "$addToSet":
+                parent, key = _parent(doc, field, True)
+                items = parent.setdefault(key, [])
+                if value not in items:
+                    items.append(value)
+            elif op == "$pull":
+                parent, key = _parent(doc, field, False)
+                if parent is not None and isinstance(parent.get(key), list):
+                    parent[key] = [item for item in parent[key] if item != value]
+            else:
+                raise NotImplementedError(f"Unsupported update operator: {op}")
+
+
+def _project(doc: dict, projection):
+    if not projection:
+        return doc
+    include = [field for field, keep in projection.items() if keep and field != "_id"]
+    if include:
+        out = {field: doc[field] for field in include if field in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+
+def _dump(doc: dict) -> str:
+    return json.dumps(doc, default=str)
+
+
+class SQLiteCursor:
+    def __init__(self, collection, query, projection, batch_size, sort, limit):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._batch_size = batch_size or 1000
+        self._sort = sort
+        self._limit = limit
+
+    def batch_size(self, batch_size: int):
+        self._batch_size = batch_size
+        return self
+
+    async def _iterate(self):
+        if self._sort or self._limit:
+            docs = await self._collection._run(
+                self._collection._sorted, self._query, self._sort, self._limit
+            )
+            for doc in docs:
+                yield _project(doc, self._projection)
+            return
+        last = 0
+        while True:
+            rows = await self._collection._run(
+                self._collection._page, self._query, last, self._batch_size
+            )
+            for _, doc in rows:
+                yield _project(doc, self._projection)
+            if len(rows) < self._batch_size:
+                return
+            last = rows[-1][0]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def to_list(self, length=None):
+        docs = []
+        async for doc in self:
+            docs.append(doc)
+            if length and len(docs) >= length:
+                break
+        return docs
+
+
+class SQLiteCollection:
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self._table = '"' + name.replace('"', '""') + '"'
+
+    async def _run(self, fn, *args):
+        return await self.database._run(self, fn, *args)
+
+    # The methods below run on the worker thread.
+
+    def _rows(self, query, limit=None):
+        where, params = _where(query)
+        sql = f"SELECT id, doc FROM {self._table} WHERE {where}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [
+            (key, json.loads(doc))
+            for key, doc in self.database._conn.execute(sql, params)
+        ]
+
+    def _page(self, query, after: int, size: int):
+        where, params = _where(query)
+        cursor = self.database._conn.execute(
+            f"SELECT rowid, doc FROM {self._table} WHERE rowid > ? AND {where} "
+            f"ORDER BY rowid LIMIT ?",
+            [after, *params, size],
+        )
+        return [(rowid, json.loads(doc)) for rowid, doc in cursor]
+
+    def _sorted(self, query, sort, limit):
+        where, params = _where(query)
+        sql = f"SELECT doc FROM {self._table} WHERE {where}"
+        if sort:
+            sql += " ORDER BY " + ", ".join(
+                f"{_expr(field)} {'DESC' if direction < 0 else 'ASC'}"
+                for field, direction in sort
+            )
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [json.loads(doc) for (doc,) in self.database._conn.execute(sql, params)]
+
+    def _insert(self, doc: dict):
+        doc.setdefault("_id", uuid.uuid4().hex)
+        self.database._conn.execute(
+            f"INSERT INTO {self._table} (id, doc) VALUES (?, ?)",
+            (_key(doc["_id"]), _dump(doc)),
+        )
+        return doc["_id"]
+
+    def _update(self, query, update, upsert, many=False):
+        rows = self._rows(query, None if many else 1)
+        if not rows:
+            if not upsert:
+                return UpdateResult(0, 0, None), None
+            doc = {}
+            for field, value in (query or {}).items():
+                if not isinstance(value, dict):
+                    parent, key = _parent(doc, field, True)
+                    parent[key] = value
+            _apply(doc, update, True)
+            return UpdateResult(0, 0, self._insert(doc)), doc
+        modified = 0
+        for key, doc in rows:
+            before = _dump(doc)
+            _apply(doc, update, False)
+            after = _dump(doc)
+            if after != before:
+                modified += 1
+                self.database._conn.execute(
+                    f"UPDATE {self._table} SET doc = ? WHERE id = ?", (after, key)
+                )
+        return UpdateResult(len(rows), modified, None), rows[-1][1]
+
+    def _delete(self, query, many: bool) -> int:
+        keys = [key for key, _ in self._rows(query, None if many else 1)]
+        self.database._conn.executemany(
+            f"DELETE FROM {self._table} WHERE id = ?", [(key,) for key in keys]
+        )
+        return len(keys)
+
+    def _find_one(self, query):
+        rows = self._rows(query, 1)
+        return rows[0][1] if rows else None
+
+    def _count(self, query):
+        where, params = _where(query)
+        return self.database._conn.execute(
+            f"SELECT COUNT(*) FROM {self._table} WHERE {where}", params
+        ).fetchone()[0]
+
+    def _write(self, fn, *args):
+        with self.database._transaction():
+            return fn(*args)
+
+    def _find_one_and_update(self, query, update, upsert, return_document):
+        with self.database._transaction():
+            before = self._find_one(query)
+            _, after = self._update(query, update, upsert)
+        return after if return_document == ReturnDocument.AFTER else before
+
+    def _bulk_write(self, requests, ordered):
+        matched = modified = upserted = deleted = 0
+        errors = []
+        with self.database._transaction():
+            for request in requests:
+                try:
+                    if isinstance(request, UpdateOne):
+                        result, _ = self._update(
+                            request._filter, request._doc, request._upsert
+                        )
+                        matched += result.matched_count
+                        modified += result.modified_count
+                        upserted += result.upserted_id is not None
+                    elif isinstance(request, DeleteOne):
+                        deleted += self._delete(request._filter, False)
+                    else:
+                        raise NotImplementedError(
+                            f"Unsupported bulk operation: {request!r}"
+                        )
+                except sqlite3.IntegrityError as e:
+                    if ordered:
+                        raise
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return BulkWriteResult(matched, modified, upserted, deleted)
+
+    def _create_index(self, keys, unique):
+        if isinstance(keys, str):
+            keys = [keys]
+        fields = [key[0] if isinstance(key, (list, tuple)) else key for key in keys]
+        name = "_".join([self.name, *fields]).replace(".", "_")
+        self.database._conn.execute(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{name}" '
+            f"ON {self._table} ({', '.join(_expr(field) for field in fields)})"
+        )
+        return name
+
+    # Motor-compatible API.
+
+    async def find_one(self, query=None, projection=None):
+        doc = await self._run(self._find_one, query)
+        return None if doc is None else _project(doc, projection)
+
+    def find(
+        self, query=None, projection=None, batch_size=0, sort=None, limit=0, **kwargs
+    ):
+        return SQLiteCursor(self, query, projection, batch_size, sort, limit)
+
+    async def count_documents(self, query):
+        return await self._run(self._count, query)
+
+    async def estimated_document_count(self):
+        return await self._run(self._count, None)
+
+    async def insert_one(self, doc: dict):
+        inserted = await self._run(self._write, self._insert, dict(doc))
+        return InsertOneResult(inserted)
+
+    async def update_one(self, query, update, upsert=False):
+        result, _ = await self._run(self._write, self._update, query, update, upsert)
+        return result
+
+    async def update_many(self, query, update, upsert=False):
+        result, _ = await self._run(
+            self._write, self._update, query, update, upsert, True
+        )
+        return result
+
+    async def find_one_and_update(
+        self,
+        query,
+        update,
+        projection=None,
+        upsert=False,
+        return_document=ReturnDocument.BEFORE,
+    ):
+        doc = await self._run(
+            self._find_one_and_update, query, update, upsert, return_document
+        )
+        return None if doc is None else _project(doc, projection)
+
+    async def delete_one(self, query):
+        return DeleteResult(await self._run(self._write, self._delete, query, False))
+
+    async def delete_many(self, query):
+        return DeleteResult(await self._run(self._write, self._delete, query, True))
+
+    async def bulk_write(self, requests, ordered=True):
+        return await self._run(self._bulk_write, list(requests), ordered)
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        return await self._run(self._create_index, keys, unique)
+
+
+class SQLiteDatabase:
+    """Embedded stand-in for the Motor database, stored in one SQLite file.
+
+    It covers the part of the collection API the bot uses: find_one, find,
+    count_documents, insert_one, update_one, find_one_and_update, delete_one,
+    delete_many, bulk_write, create_index and the dbstats command. Filters
+    support equality, $gt/$gte/$lt/$lte and $exists on dotted fields; updates
+    support $set, $setOnInsert, $unset, $addToSet and $pull.
+
+    Each collection is a table of JSON documents keyed by _id, and filters run
+    through json_extract so that create_index() builds indexes the lookups
+    use. Writes take the database lock, as two processes share the file
+    during a handoff.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # One thread owns the connection, which also orders the statements.
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite")
+        self._collections = {}
+        self._tables = set()
+
+    def __getattr__(self, name: str) -> SQLiteCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> SQLiteCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = SQLiteCollection(self, name)
+        return collection
+
+    @contextmanager
+    def _transaction(self):
+        if self._conn.in_transaction:
+            yield
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _call(self, collection: SQLiteCollection, fn, args):
+        if collection.name not in self._tables:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {collection._table} "
+                "(id TEXT PRIMARY KEY, doc TEXT NOT NULL)"
+            )
+            self._tables.add(collection.name)
+        return fn(*args)
+
+    async def _run(self, collection: SQLiteCollection, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._call, collection, fn, args
+        )
+
+    def _stats(self) -> dict:
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        tables = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        ]
+        objects = sum(
+            self._conn.execute(
+                f'SELECT COUNT(*) FROM "{table.replace(chr(34), chr(34) * 2)}"'
+            ).fetchone()[0]
+            for table in tables
+        )
+        return {
+            "db": os.path.basename(self.path),
+            "collections": len(tables),
+            "objects": objects,
+            "dataSize": (pages - free) * page_size,
+            "storageSize": pages * page_size,
+        }
+
+    async def command(self, name: str, *args, **kwargs):
+        if name != "dbstats":
+            raise NotImplementedError(f"Unsupported command: {name}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._stats)
@@ -2,10 +2,12 @@ import socket
 import time
 
 import heroku3
+from pymongo import ReturnDocument
 from pyrogram import filters
 
 import config
 from ShrutiMusic.core.mongo import mongodb
+from ShrutiMusic.core.session import sessions
 
 from .logging import LOGGER
 
@@ -38,7 +40,7 @@ XCB = [
 
 def dbb():
     global db
-    db = {}
+    db = sessions.queues
     LOGGER(__name__).info(f"Local Database Initialized.")
 
 
@@ -46,15 +48,13 @@ async def sudo():
     global SUDOERS
     SUDOERS.add(config.OWNER_ID)
     sudoersdb = mongodb.sudoers
-    sudoers = await sudoersdb.find_one({"sudo": "sudo"})
-    sudoers = [] if not sudoers else sudoers["sudoers"]
-    if config.OWNER_ID not in sudoers:
-        sudoers.append(config.OWNER_ID)
-        await sudoersdb.update_one(
-            {"sudo": "sudo"},
-            {"$set": {"sudoers": sudoers}},
-            upsert=True,
-        )
+    sudoers = await sudoersdb.find_one_and_update(
+        {"sudo": "sudo"},
+        {"$addToSet": {"sudoers": config.OWNER_ID}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    sudoers = sudoers["sudoers"]
     if sudoers:
         for user_id in sudoers:
             SUDOERS.add(user_id)
@@ -2,11 +2,11 @@ from pyrogram import filters
 from pyrogram.types import Message
 
 from ShrutiMusic import app
-from ShrutiMusic.utils import extract_user, int_to_alpha
+from ShrutiMusic.utils import extract_user
 from ShrutiMusic.utils.database import (
     delete_authuser,
-    get_authuser,
-    get_authuser_names,
+    get_authuser_notes,
+    get_authusers,
     save_authuser,
 )
 from ShrutiMusic.utils.decorators import AdminActual, language
@@ -21,12 +21,10 @@ async def auth(client, message: Message, _):
         if len(message.command) != 2:
             return await message.reply_text(_["general_1"])
     user = await extract_user(message)
-    token = await int_to_alpha(user.id)
-    _check = await get_authuser_names(message.chat.id)
-    count = len(_check)
-    if int(count) == 25:
+    _check = await get_authusers(message.chat.id)
+    if len(_check) >= 25:
         return await message.reply_text(_["auth_1"])
-    if token not in _check:
+    if user.id not in _check:
         assis = {
             "auth_user_id": user.id,
             "auth_name": user.first_name,
@@ -35,9 +33,8 @@ async def auth(client, message: Message, _):
         }
         get = adminlist.get(message.chat.id)
         if get:
-            if user.id not in get:
-                get.append(user.id)
-        await save_authuser(message.chat.id, token, assis)
+            get.add(user.id)
+        await save_authuser(message.chat.id, user.id, assis)
         return await message.reply_text(_["auth_2"].format(user.mention))
     else:
         return await message.reply_text(_["auth_3"].format(user.mention))
@@ -50,12 +47,10 @@ async def unauthusers(client, message: Message, _):
         if len(message.command) != 2:
             return await message.reply_text(_["general_1"])
     user = await extract_user(message)
-    token = await int_to_alpha(user.id)
-    deleted = await delete_authuser(message.chat.id, token)
+    deleted = await delete_authuser(message.chat.id, user.id)
     get = adminlist.get(message.chat.id)
     if get:
-        if user.id in get:
-            get.remove(user.id)
+        get.discard(user.id)
     if deleted:
         return await message.reply_text(_["auth_4"].format(user.mention))
     else:
@@ -67,15 +62,14 @@ async def unauthusers(client, message: Message, _):
 )
 @language
 async def authusers(client, message: Message, _):
-    _wtf = await get_authuser_names(message.chat.id)
+    _wtf = await get_authuser_notes(message.chat.id)
     if not _wtf:
         return await message.reply_text(_["setting_4"])
     else:
         j = 0
         mystic = await message.reply_text(_["auth_6"])
         text = _["auth_7"].format(message.chat.title)
-        for umm in _wtf:
-            _umm = await get_authuser(message.chat.id, umm)
+        for _umm in _wtf.values():
             user_id = _umm["auth_user_id"]
             admin_id = _umm["admin_id"]
             admin_name = _umm["admin_name"]
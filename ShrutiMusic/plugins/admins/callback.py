@@ -5,10 +5,9 @@ from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from ShrutiMusic import YouTube, app
 from ShrutiMusic.core.call import Aviax
+from ShrutiMusic.core.session import sessions
 from ShrutiMusic.misc import SUDOERS, db
 from ShrutiMusic.utils.database import (
-    get_active_chats,
-    get_lang,
     get_upvote_count,
     is_active_chat,
     is_music_playing,
@@ -18,8 +17,8 @@ from ShrutiMusic.utils.database import (
     set_loop,
 )
 from ShrutiMusic.utils.decorators.language import languageCB
-from ShrutiMusic.utils.formatters import seconds_to_min
-from ShrutiMusic.utils.inline import close_markup, stream_markup, stream_markup_timer
+from ShrutiMusic.utils.inline import close_markup, stream_markup
+from ShrutiMusic.utils.refresher import refresher
 from ShrutiMusic.utils.stream.autoclear import auto_clean
 from ShrutiMusic.utils.thumbnails import gen_thumb
 from config import (
@@ -29,15 +28,9 @@ from config import (
     TELEGRAM_AUDIO_URL,
     TELEGRAM_VIDEO_URL,
     adminlist,
-    confirmer,
-    votemode,
 )
-from strings import get_string
 import config
 
-checker = {}
-upvoters = {}
-
 
 @app.on_callback_query(filters.regex("ADMIN") & ~BANNED_USERS)
 @languageCB
@@ -54,35 +47,20 @@ async def del_back_playlist(client, CallbackQuery, _):
         return await CallbackQuery.answer(_["general_5"], show_alert=True)
     mention = CallbackQuery.from_user.mention
     if command == "UpVote":
-        if chat_id not in votemode:
-            votemode[chat_id] = {}
-        if chat_id not in upvoters:
-            upvoters[chat_id] = {}
-
-        voters = (upvoters[chat_id]).get(CallbackQuery.message.id)
-        if not voters:
-            upvoters[chat_id][CallbackQuery.message.id] = []
-
-        vote = (votemode[chat_id]).get(CallbackQuery.message.id)
-        if not vote:
-            votemode[chat_id][CallbackQuery.message.id] = 0
-
-        if CallbackQuery.from_user.id in upvoters[chat_id][CallbackQuery.message.id]:
-            (upvoters[chat_id][CallbackQuery.message.id]).remove(
-                CallbackQuery.from_user.id
-            )
-            votemode[chat_id][CallbackQuery.message.id] -= 1
+        session = sessions.open(chat_id)
+        message_id = CallbackQuery.message.id
+        voters = session.upvoters.setdefault(message_id, set())
+        if CallbackQuery.from_user.id in voters:
+            voters.discard(CallbackQuery.from_user.id)
         else:
-            (upvoters[chat_id][CallbackQuery.message.id]).append(
-                CallbackQuery.from_user.id
-            )
-            votemode[chat_id][CallbackQuery.message.id] += 1
+            voters.add(CallbackQuery.from_user.id)
+        session.votes[message_id] = len(voters)
         upvote = await get_upvote_count(chat_id)
-        get_upvotes = int(votemode[chat_id][CallbackQuery.message.id])
+        get_upvotes = session.votes[message_id]
         if get_upvotes >= upvote:
-            votemode[chat_id][CallbackQuery.message.id] = upvote
+            session.votes[message_id] = upvote
             try:
-                exists = confirmer[chat_id][CallbackQuery.message.id]
+                exists = session.confirmer[message_id]
                 current = db[chat_id][0]
             except:
                 return await CallbackQuery.edit_message_text(f"ғᴀɪʟᴇᴅ.")
@@ -100,10 +78,7 @@ async def del_back_playlist(client, CallbackQuery, _):
             command = counter
             mention = "ᴜᴘᴠᴏᴛᴇs"
         else:
-            if (
-                CallbackQuery.from_user.id
-                in upvoters[chat_id][CallbackQuery.message.id]
-            ):
+            if CallbackQuery.from_user.id in voters:
                 await CallbackQuery.answer(_["admin_38"], show_alert=True)
             else:
                 await CallbackQuery.answer(_["admin_39"], show_alert=True)
@@ -350,48 +325,4 @@ async def del_back_playlist(client, CallbackQuery, _):
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
 
 
-async def markup_timer():
-    while not await asyncio.sleep(7):
-        active_chats = await get_active_chats()
-        for chat_id in active_chats:
-            try:
-                if not await is_music_playing(chat_id):
-                    continue
-                playing = db.get(chat_id)
-                if not playing:
-                    continue
-                duration_seconds = int(playing[0]["seconds"])
-                if duration_seconds == 0:
-                    continue
-                try:
-                    mystic = playing[0]["mystic"]
-                except:
-                    continue
-                try:
-                    check = checker[chat_id][mystic.id]
-                    if check is False:
-                        continue
-                except:
-                    pass
-                try:
-                    language = await get_lang(chat_id)
-                    _ = get_string(language)
-                except:
-                    _ = get_string("en")
-                try:
-                    buttons = stream_markup_timer(
-                        _,
-                        chat_id,
-                        seconds_to_min(playing[0]["played"]),
-                        playing[0]["dur"],
-                    )
-                    await mystic.edit_reply_markup(
-                        reply_markup=InlineKeyboardMarkup(buttons)
-                    )
-                except:
-                    continue
-            except:
-                continue
-
-
-asyncio.create_task(markup_timer())
+asyncio.create_task(refresher())
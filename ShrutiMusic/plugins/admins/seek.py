@@ -1,11 +1,12 @@
 from pyrogram import filters
 from pyrogram.types import Message
 
-from ShrutiMusic import YouTube, app
+from ShrutiMusic import app
 from ShrutiMusic.core.call import Aviax
 from ShrutiMusic.misc import db
 from ShrutiMusic.utils import AdminRightsCheck, seconds_to_min
 from ShrutiMusic.utils.inline import close_markup
+from ShrutiMusic.utils.stream.source import resolve_source
 from config import BANNED_USERS
 
 
@@ -27,7 +28,6 @@ async def seek_comm(cli, message: Message, _, chat_id):
     duration_seconds = int(playing[0]["seconds"])
     if duration_seconds == 0:
         return await message.reply_text(_["admin_22"])
-    file_path = playing[0]["file"]
     duration_played = int(playing[0]["played"])
     duration_to_skip = int(query)
     duration = playing[0]["dur"]
@@ -46,30 +46,23 @@ async def seek_comm(cli, message: Message, _, chat_id):
             )
         to_seek = duration_played + duration_to_skip + 1
     mystic = await message.reply_text(_["admin_24"])
-    if "vid_" in file_path:
-        n, file_path = await YouTube.video(playing[0]["vidid"], True)
-        if n == 0:
-            return await message.reply_text(_["admin_22"])
-    check = (playing[0]).get("speed_path")
-    if check:
-        file_path = check
-    if "index_" in file_path:
-        file_path = playing[0]["vidid"]
-    try:
-        await Aviax.seek_stream(
-            chat_id,
-            file_path,
-            seconds_to_min(to_seek),
-            duration,
-            playing[0]["streamtype"],
-        )
-    except:
+    file_path = (playing[0]).get("speed_path") or await resolve_source(chat_id)
+    if not file_path:
+        return await mystic.edit_text(_["admin_22"])
+    track = playing[0]
+    track["played"] = to_seek - 1
+    seeked = await Aviax.debounced_seek(
+        chat_id,
+        file_path,
+        seconds_to_min(to_seek),
+        duration,
+        track["streamtype"],
+    )
+    if not seeked:
+        if track["played"] == to_seek - 1:
+            track["played"] = duration_played
         return await mystic.edit_text(_["admin_26"], reply_markup=close_markup(_))
-    if message.command[0][-2] == "c":
-        db[chat_id][0]["played"] -= duration_to_skip
-    else:
-        db[chat_id][0]["played"] += duration_to_skip
     await mystic.edit_text(
-        text=_["admin_25"].format(seconds_to_min(to_seek), message.from_user.mention),
+        text=_["admin_25"].format(seeked, message.from_user.mention),
         reply_markup=close_markup(_),
     )
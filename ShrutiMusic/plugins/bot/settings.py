@@ -11,8 +11,7 @@ from pyrogram.types import (
 from ShrutiMusic import app
 from ShrutiMusic.utils.database import (
     add_nonadmin_chat,
-    get_authuser,
-    get_authuser_names,
+    get_authuser_notes,
     get_playmode,
     get_playtype,
     get_upvote_count,
@@ -304,7 +303,7 @@ async def playmode_ans(client, CallbackQuery, _):
 async def authusers_mar(client, CallbackQuery, _):
     command = CallbackQuery.matches[0].group(1)
     if command == "AUTHLIST":
-        _authusers = await get_authuser_names(CallbackQuery.message.chat.id)
+        _authusers = await get_authuser_notes(CallbackQuery.message.chat.id)
         if not _authusers:
             try:
                 return await CallbackQuery.answer(_["setting_4"], show_alert=True)
@@ -318,8 +317,7 @@ async def authusers_mar(client, CallbackQuery, _):
             j = 0
             await CallbackQuery.edit_message_text(_["auth_6"])
             msg = _["auth_7"].format(CallbackQuery.message.chat.title)
-            for note in _authusers:
-                _note = await get_authuser(CallbackQuery.message.chat.id, note)
+            for _note in _authusers.values():
                 user_id = _note["auth_user_id"]
                 admin_id = _note["admin_id"]
                 admin_name = _note["admin_name"]
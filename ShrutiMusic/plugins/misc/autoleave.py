@@ -5,7 +5,8 @@ from pytgcalls.exceptions import GroupCallNotFound
 import config
 from ShrutiMusic import app
 from ShrutiMusic.misc import db
-from ShrutiMusic.core.call import Aviax, autoend, counter
+from ShrutiMusic.core.call import Aviax
+from ShrutiMusic.core.session import sessions
 from ShrutiMusic.utils.database import get_client, set_loop, is_active_chat, is_autoend, is_autoleave
 import logging
 
@@ -44,17 +45,17 @@ async def auto_leave():
 asyncio.create_task(auto_leave())
                     
 async def auto_end():
-    global autoend, counter
     while True:
         await asyncio.sleep(60)
         try:
             ender = await is_autoend()
             if not ender:
                 continue
-            chatss = autoend
-            keys_to_remove = []
             nocall = False
-            for chat_id in chatss:
+            for session in sessions.values():
+                if not session.autoend:
+                    continue
+                chat_id = session.chat_id
                 try:
                     users = len(await Aviax.call_listeners(chat_id))
                 except GroupCallNotFound:
@@ -62,10 +63,9 @@ async def auto_end():
                     nocall = True
                 except Exception:
                     users = 100
-                timer = autoend.get(chat_id)
                 if users == 1:
+                    session.autoend = None
                     res = await set_loop(chat_id, 0)
-                    keys_to_remove.append(chat_id)
                     try:
                         await db[chat_id][0]["mystic"].delete()
                     except Exception:
@@ -79,8 +79,6 @@ async def auto_end():
                             await app.send_message(chat_id, "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ.")
                     except Exception:
                         pass
-            for chat_id in keys_to_remove:
-                del autoend[chat_id]
         except Exception as e:
             logging.info(e)
 
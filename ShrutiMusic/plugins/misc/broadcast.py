@@ -8,13 +8,12 @@ from ShrutiMusic import app
 from ShrutiMusic.misc import SUDOERS
 from ShrutiMusic.utils.database import (
     get_active_chats,
-    get_authuser_names,
+    get_authusers,
     get_client,
-    get_served_chats,
-    get_served_users,
+    iter_served_chats,
+    iter_served_users,
 )
 from ShrutiMusic.utils.decorators.language import language
-from ShrutiMusic.utils.formatters import alpha_to_int
 from config import adminlist
 
 # Add specific user IDs that can use the broadcast command
@@ -49,8 +48,7 @@ async def braodcast_message(client, message, _):
         if "-wfchat" in message.text:
             # Broadcasting to chats
             sent_chats = 0
-            chats = [int(chat["chat_id"]) for chat in await get_served_chats()]
-            for i in chats:
+            async for i in iter_served_chats():
                 try:
                     if content_type == 'photo':
                         await app.send_photo(chat_id=i, photo=file_id, caption=caption, reply_markup=reply_markup)
@@ -67,8 +65,7 @@ async def braodcast_message(client, message, _):
         if "-wfuser" in message.text:
             # Broadcasting to users
             sent_users = 0
-            users = [int(user["user_id"]) for user in await get_served_users()]
-            for i in users:
+            async for i in iter_served_users():
                 try:
                     if content_type == 'photo':
                         await app.send_photo(chat_id=i, photo=file_id, caption=caption, reply_markup=reply_markup)
@@ -114,11 +111,7 @@ async def braodcast_message(client, message, _):
     if "-nobot" not in message.text:
         sent = 0
         pin = 0
-        chats = []
-        schats = await get_served_chats()
-        for chat in schats:
-            chats.append(int(chat["chat_id"]))
-        for i in chats:
+        async for i in iter_served_chats():
             try:
                 m = (
                     await app.copy_message(chat_id=i, from_chat_id=y, message_id=x, reply_markup=reply_markup)
@@ -153,11 +146,7 @@ async def braodcast_message(client, message, _):
 
     if "-user" in message.text:
         susr = 0
-        served_users = []
-        susers = await get_served_users()
-        for user in susers:
-            served_users.append(int(user["user_id"]))
-        for i in served_users:
+        async for i in iter_served_users():
             try:
                 m = (
                     await app.copy_message(chat_id=i, from_chat_id=y, message_id=x, reply_markup=reply_markup)
@@ -216,16 +205,13 @@ async def auto_clean():
             served_chats = await get_active_chats()
             for chat_id in served_chats:
                 if chat_id not in adminlist:
-                    adminlist[chat_id] = []
+                    adminlist[chat_id] = set()
                     async for user in app.get_chat_members(
                         chat_id, filter=ChatMembersFilter.ADMINISTRATORS
                     ):
                         if user.privileges.can_manage_video_chats:
-                            adminlist[chat_id].append(user.user.id)
-                    authusers = await get_authuser_names(chat_id)
-                    for user in authusers:
-                        user_id = await alpha_to_int(user)
-                        adminlist[chat_id].append(user_id)
+                            adminlist[chat_id].add(user.user.id)
+                    adminlist[chat_id] |= await get_authusers(chat_id)
         except:
             continue
 
@@ -0,0 +1,112 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+import config
+from ShrutiMusic import YouTube, app
+from ShrutiMusic.core.call import Aviax
+from ShrutiMusic.core.radio import get_station, station_of, stations
+from ShrutiMusic.misc import SUDOERS
+from ShrutiMusic.utils.database import is_active_chat
+from ShrutiMusic.utils.decorators import AdminActual
+from ShrutiMusic.utils.formatters import time_to_seconds
+from ShrutiMusic.utils.stream.autoclear import acquire
+from config import BANNED_USERS
+
+
+async def announce(station, track):
+    for chat_id in list(station.subscribers):
+        try:
+            await app.send_message(
+                chat_id,
+                f"» ɴᴏᴡ ᴏɴ <b>{station.name}</b> : {track['title'][:40]}\n│ \n└ʙʏ : {track['by']}",
+            )
+        except:
+            continue
+
+
+@app.on_message(filters.command(["radio"]) & SUDOERS)
+async def radio_queue(client, message: Message):
+    if len(message.command) < 3:
+        return await message.reply_text(
+            "<b>ᴇxᴀᴍᴘʟᴇ :</b>\n\n/radio [sᴛᴀᴛɪᴏɴ] [sᴏɴɢ ɴᴀᴍᴇ ᴏʀ ʏᴏᴜᴛᴜʙᴇ ʟɪɴᴋ]"
+        )
+    name = message.command[1]
+    query = message.text.split(None, 2)[2]
+    mystic = await message.reply_text("» sᴇᴀʀᴄʜɪɴɢ...")
+    try:
+        details, vidid = await YouTube.track(query)
+        if time_to_seconds(details["duration_min"]) > config.DURATION_LIMIT:
+            return await mystic.edit_text("» ᴛʀᴀᴄᴋ ɪs ʟᴏɴɢᴇʀ ᴛʜᴀɴ ᴛʜᴇ ᴅᴜʀᴀᴛɪᴏɴ ʟɪᴍɪᴛ.")
+        file_path, direct = await YouTube.download(vidid, mystic, videoid=True)
+    except Exception:
+        return await mystic.edit_text("» ғᴀɪʟᴇᴅ ᴛᴏ ғᴇᴛᴄʜ ᴛʀᴀᴄᴋ.")
+    station = get_station(name, create=True)
+    station.on_track = announce
+    station.queue.append(
+        {
+            "title": details["title"].title(),
+            "dur": details["duration_min"],
+            "by": message.from_user.first_name,
+            "file": file_path,
+            "vidid": vidid,
+        }
+    )
+    acquire(file_path)
+    await mystic.edit_text(
+        f"» ǫᴜᴇᴜᴇᴅ ᴏɴ <b>{station.name}</b> ᴀᴛ #{len(station.queue)}\n\n‣ {details['title'][:40]}"
+    )
+
+
+@app.on_message(filters.command(["radioskip"]) & SUDOERS)
+async def radio_skip(client, message: Message):
+    if len(message.command) != 2:
+        return await message.reply_text("<b>ᴇxᴀᴍᴘʟᴇ :</b>\n\n/radioskip [sᴛᴀᴛɪᴏɴ]")
+    station = get_station(message.command[1])
+    if not station or not station.current:
+        return await message.reply_text("» ɴᴏᴛʜɪɴɢ ɪs ᴘʟᴀʏɪɴɢ ᴏɴ ᴛʜɪs sᴛᴀᴛɪᴏɴ.")
+    station.skip()
+    await message.reply_text(f"» sᴋɪᴘᴘᴇᴅ ᴏɴ <b>{station.name}</b>.")
+
+
+@app.on_message(filters.command(["stations"]) & ~BANNED_USERS)
+async def radio_stations(client, message: Message):
+    if not stations:
+        return await message.reply_text("» ɴᴏ ʀᴀᴅɪᴏ sᴛᴀᴛɪᴏɴs ᴀʀᴇ ʀᴜɴɴɪɴɢ.")
+    text = "<b>» ʀᴀᴅɪᴏ sᴛᴀᴛɪᴏɴs :</b>\n\n"
+    for station in stations.values():
+        playing = station.current["title"][:30] if station.current else "-"
+        text += f"‣ <b>{station.name}</b> : {playing}\n   ʟɪsᴛᴇɴᴇʀs : {len(station.subscribers)} | ǫᴜᴇᴜᴇᴅ : {len(station.queue)}\n"
+    await message.reply_text(text)
+
+
+@app.on_message(filters.command(["tune"]) & filters.group & ~BANNED_USERS)
+@AdminActual
+async def radio_tune(client, message: Message, _):
+    if len(message.command) != 2:
+        return await message.reply_text("<b>ᴇxᴀᴍᴘʟᴇ :</b>\n\n/tune [sᴛᴀᴛɪᴏɴ]")
+    station = get_station(message.command[1])
+    if not station:
+        return await message.reply_text("» ɴᴏ sᴜᴄʜ ʀᴀᴅɪᴏ sᴛᴀᴛɪᴏɴ.")
+    if await is_active_chat(message.chat.id):
+        return await message.reply_text("» sᴛᴏᴘ ᴛʜᴇ ᴄᴜʀʀᴇɴᴛ sᴛʀᴇᴀᴍ ʙᴇғᴏʀᴇ ᴛᴜɴɪɴɢ ɪɴ.")
+    try:
+        await Aviax.join_radio(message.chat.id, station)
+    except Exception as e:
+        ex_type = type(e).__name__
+        err = e if ex_type == "AssistantErr" else _["general_2"].format(ex_type)
+        return await message.reply_text(err)
+    await message.reply_text(
+        f"» ᴛᴜɴᴇᴅ ɪɴᴛᴏ <b>{station.name}</b> ʙʏ {message.from_user.mention}."
+    )
+
+
+@app.on_message(filters.command(["untune"]) & filters.group & ~BANNED_USERS)
+@AdminActual
+async def radio_untune(client, message: Message, _):
+    station = station_of(message.chat.id)
+    if not station:
+        return await message.reply_text("» ᴛʜɪs ᴄʜᴀᴛ ɪs ɴᴏᴛ ᴛᴜɴᴇᴅ ɪɴᴛᴏ ᴀɴʏ sᴛᴀᴛɪᴏɴ.")
+    await Aviax.stop_stream(message.chat.id)
+    await message.reply_text(
+        f"» ᴛᴜɴᴇᴅ ᴏᴜᴛ ᴏғ <b>{station.name}</b> ʙʏ {message.from_user.mention}."
+    )
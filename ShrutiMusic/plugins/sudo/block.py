@@ -3,7 +3,7 @@ from pyrogram.types import Message
 
 from ShrutiMusic import app
 from ShrutiMusic.misc import SUDOERS
-from ShrutiMusic.utils.database import add_gban_user, remove_gban_user
+from ShrutiMusic.utils.database import add_gban_user, is_gbanned_user, remove_gban_user
 from ShrutiMusic.utils.decorators.language import language
 from ShrutiMusic.utils.extraction import extract_user
 from config import BANNED_USERS
@@ -16,10 +16,9 @@ async def useradd(client, message: Message, _):
         if len(message.command) != 2:
             return await message.reply_text(_["general_1"])
     user = await extract_user(message)
-    if user.id in BANNED_USERS:
+    if await is_gbanned_user(user.id):
         return await message.reply_text(_["block_1"].format(user.mention))
     await add_gban_user(user.id)
-    BANNED_USERS.add(user.id)
     await message.reply_text(_["block_2"].format(user.mention))
 
 
@@ -30,10 +29,9 @@ async def userdel(client, message: Message, _):
         if len(message.command) != 2:
             return await message.reply_text(_["general_1"])
     user = await extract_user(message)
-    if user.id not in BANNED_USERS:
+    if not await is_gbanned_user(user.id):
         return await message.reply_text(_["block_3"].format(user.mention))
     await remove_gban_user(user.id)
-    BANNED_USERS.remove(user.id)
     await message.reply_text(_["block_4"].format(user.mention))
 
 
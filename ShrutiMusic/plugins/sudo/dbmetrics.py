@@ -0,0 +1,48 @@
+import time
+
+from pyrogram import filters
+from pyrogram.types import Message
+
+from ShrutiMusic import app
+from ShrutiMusic.core.dbmetrics import dbmetrics
+from ShrutiMusic.misc import SUDOERS
+from ShrutiMusic.utils.database import authusers, chatsettings
+from ShrutiMusic.utils.formatters import get_readable_time
+
+# Operations listed in the summary, slowest in total first.
+TOP = 20
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+@app.on_message(filters.command(["dbmetrics", "dbstat"]) & SUDOERS)
+async def db_metrics(_, message: Message):
+    if len(message.command) == 2 and message.command[1].lower() == "reset":
+        dbmetrics.reset()
+        return await message.reply_text("» ᴅᴀᴛᴀʙᴀsᴇ ᴍᴇᴛʀɪᴄs ʀᴇsᴇᴛ.")
+    if not dbmetrics.ops:
+        return await message.reply_text("» ɴᴏ ᴅᴀᴛᴀʙᴀsᴇ ᴄᴀʟʟs ʀᴇᴄᴏʀᴅᴇᴅ ʏᴇᴛ.")
+    since = get_readable_time(int(time.time() - dbmetrics.since))
+    text = f"<b>» ᴅᴀᴛᴀʙᴀsᴇ ᴄᴀʟʟs ɪɴ ᴛʜᴇ ʟᴀsᴛ {since} :</b>\n\n"
+    text += "<code>op : count | p50 / p95 / p99 ms | errors</code>\n"
+    ops = sorted(dbmetrics.ops.items(), key=lambda x: x[1].total, reverse=True)
+    for (collection, op), stats in ops[:TOP]:
+        text += (
+            f"<code>{collection}.{op}</code> : {stats.count} | "
+            f"{_ms(stats.percentile(0.5))} / {_ms(stats.percentile(0.95))} / "
+            f"{_ms(stats.percentile(0.99))} | {stats.errors}\n"
+        )
+    text += "\n<b>» ᴘᴇʀ ᴄᴏʟʟᴇᴄᴛɪᴏɴ :</b>\n"
+    for collection, (count, total) in sorted(
+        dbmetrics.by_collection().items(), key=lambda x: x[1][1], reverse=True
+    ):
+        text += f"<code>{collection}</code> : {count} ᴄᴀʟʟs, {_ms(total)} ms\n"
+    text += "\n<b>» ᴄᴀᴄʜᴇ ʜɪᴛ ʀᴀᴛᴇs :</b>\n"
+    for name, cache in (("chatsettings", chatsettings), ("authusers", authusers)):
+        text += (
+            f"<code>{name}</code> : {cache.hit_rate:.1%} "
+            f"({cache.hits} ʜɪᴛs, {cache.misses} ᴍɪssᴇs, {len(cache)} ᴇɴᴛʀɪᴇs)\n"
+        )
+    await message.reply_text(text)
@@ -10,14 +10,14 @@ from ShrutiMusic.utils import get_readable_time
 from ShrutiMusic.utils.database import (
     add_banned_user,
     get_banned_count,
-    get_banned_users,
-    get_served_chats,
+    get_served_chats_count,
     is_banned_user,
+    iter_banned_users,
+    iter_served_chats,
     remove_banned_user,
 )
 from ShrutiMusic.utils.decorators.language import language
 from ShrutiMusic.utils.extraction import extract_user
-from config import BANNED_USERS
 
 
 @app.on_message(filters.command(["gban", "globalban"]) & SUDOERS)
@@ -36,16 +36,11 @@ async def global_ban(client, message: Message, _):
     is_gbanned = await is_banned_user(user.id)
     if is_gbanned:
         return await message.reply_text(_["gban_4"].format(user.mention))
-    if user.id not in BANNED_USERS:
-        BANNED_USERS.add(user.id)
-    served_chats = []
-    chats = await get_served_chats()
-    for chat in chats:
-        served_chats.append(int(chat["chat_id"]))
-    time_expected = get_readable_time(len(served_chats))
+    await add_banned_user(user.id)
+    time_expected = get_readable_time(await get_served_chats_count())
     mystic = await message.reply_text(_["gban_5"].format(user.mention, time_expected))
     number_of_chats = 0
-    for chat_id in served_chats:
+    async for chat_id in iter_served_chats():
         try:
             await app.ban_chat_member(chat_id, user.id)
             number_of_chats += 1
@@ -53,7 +48,6 @@ async def global_ban(client, message: Message, _):
             await asyncio.sleep(int(fw.value))
         except:
             continue
-    await add_banned_user(user.id)
     await message.reply_text(
         _["gban_6"].format(
             app.mention,
@@ -78,16 +72,11 @@ async def global_un(client, message: Message, _):
     is_gbanned = await is_banned_user(user.id)
     if not is_gbanned:
         return await message.reply_text(_["gban_7"].format(user.mention))
-    if user.id in BANNED_USERS:
-        BANNED_USERS.remove(user.id)
-    served_chats = []
-    chats = await get_served_chats()
-    for chat in chats:
-        served_chats.append(int(chat["chat_id"]))
-    time_expected = get_readable_time(len(served_chats))
+    await remove_banned_user(user.id)
+    time_expected = get_readable_time(await get_served_chats_count())
     mystic = await message.reply_text(_["gban_8"].format(user.mention, time_expected))
     number_of_chats = 0
-    for chat_id in served_chats:
+    async for chat_id in iter_served_chats():
         try:
             await app.unban_chat_member(chat_id, user.id)
             number_of_chats += 1
@@ -95,7 +84,6 @@ async def global_un(client, message: Message, _):
             await asyncio.sleep(int(fw.value))
         except:
             continue
-    await remove_banned_user(user.id)
     await message.reply_text(_["gban_9"].format(user.mention, number_of_chats))
     await mystic.delete()
 
@@ -109,8 +97,7 @@ async def gbanned_list(client, message: Message, _):
     mystic = await message.reply_text(_["gban_11"])
     msg = _["gban_12"]
     count = 0
-    users = await get_banned_users()
-    for user_id in users:
+    async for user_id in iter_banned_users():
         count += 1
         try:
             user = await app.get_users(user_id)
@@ -1,7 +1,9 @@
 import asyncio
 import os
 import shutil
+import signal
 import socket
+import subprocess
 from datetime import datetime
 
 import urllib3
@@ -11,14 +13,17 @@ from pyrogram import filters
 
 import config
 from ShrutiMusic import app
+from ShrutiMusic.core.handoff import handoff
 from ShrutiMusic.misc import HAPP, SUDOERS, XCB
 from ShrutiMusic.utils.database import (
+    flush_served,
     get_active_chats,
     remove_active_chat,
     remove_active_video_chat,
 )
 from ShrutiMusic.utils.decorators.language import language
 from ShrutiMusic.utils.pastebin import AviaxBin
+from ShrutiMusic.utils.stream.persist import freeze, thaw
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -76,6 +81,11 @@ async def update_(client, message, _):
         nrs = await response.edit(_final_updates_, disable_web_page_preview=True)
     os.system("git stash &> /dev/null && git pull")
 
+    try:
+        await freeze()
+        await flush_served()
+    except:
+        pass
     try:
         served_chats = await get_active_chats()
         for x in served_chats:
@@ -113,6 +123,11 @@ async def update_(client, message, _):
 @app.on_message(filters.command(["restart"]) & SUDOERS)
 async def restart_(_, message):
     response = await message.reply_text("ʀᴇsᴛᴀʀᴛɪɴɢ...")
+    try:
+        await freeze()
+        await flush_served()
+    except:
+        pass
     ac_chats = await get_active_chats()
     for x in ac_chats:
         try:
@@ -135,3 +150,47 @@ async def restart_(_, message):
         "» ʀᴇsᴛᴀʀᴛ ᴘʀᴏᴄᴇss sᴛᴀʀᴛᴇᴅ, ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ ғᴏʀ ғᴇᴡ sᴇᴄᴏɴᴅs ᴜɴᴛɪʟ ᴛʜᴇ ʙᴏᴛ sᴛᴀʀᴛs..."
     )
     os.system(f"kill -9 {os.getpid()} && bash start")
+
+
+# Seconds the old process keeps running once the new one took over the calls.
+HANDOFF_GRACE = 3
+
+draining = filters.create(lambda _, __, ___: handoff.draining)
+
+
+@app.on_message(draining, group=-100)
+async def drained_message(_, message):
+    message.stop_propagation()
+
+
+@app.on_callback_query(draining, group=-100)
+async def drained_callback(_, query):
+    query.stop_propagation()
+
+
+@app.on_message(filters.command(["handoff"]) & SUDOERS)
+async def handoff_(_, message):
+    if await is_heroku():
+        return await message.reply_text("» ʜᴀɴᴅᴏғғ ɪs ɴᴏᴛ sᴜᴘᴘᴏʀᴛᴇᴅ ᴏɴ ʜᴇʀᴏᴋᴜ, ᴜsᴇ /restart.")
+    response = await message.reply_text("» sᴛᴀʀᴛɪɴɢ ᴀ ɴᴇᴡ ɪɴsᴛᴀɴᴄᴇ...")
+    await freeze()
+    await flush_served()
+    await handoff.request()
+    proc = subprocess.Popen(["bash", "start"], start_new_session=True)
+    marker = await handoff.wait(config.HANDOFF_TIMEOUT)
+    if not marker:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await handoff.cancel()
+        thaw()
+        return await response.edit_text(
+            "» ᴛʜᴇ ɴᴇᴡ ɪɴsᴛᴀɴᴄᴇ ᴅɪᴅ ɴᴏᴛ ᴛᴀᴋᴇ ᴏᴠᴇʀ ɪɴ ᴛɪᴍᴇ, ᴋᴇᴇᴘɪɴɢ ᴛʜɪs ᴏɴᴇ ʀᴜɴɴɪɴɢ."
+        )
+    await response.edit_text(
+        f"» ʜᴀɴᴅᴇᴅ ᴏᴠᴇʀ {marker.get('resumed', 0)} ᴄᴀʟʟs ᴛᴏ ᴛʜᴇ ɴᴇᴡ ɪɴsᴛᴀɴᴄᴇ."
+    )
+    await asyncio.sleep(HANDOFF_GRACE)
+    # Leaving the calls here would kick the assistants the new process uses.
+    os._exit(0)
@@ -3,6 +3,7 @@ from pyrogram.types import Message
 from unidecode import unidecode
 
 from ShrutiMusic import app
+from ShrutiMusic.core.session import sessions
 from ShrutiMusic.misc import SUDOERS
 from ShrutiMusic.utils.database import (
     get_active_chats,
@@ -38,6 +39,12 @@ async def activevc(_, message: Message):
     if not text:
         await mystic.edit_text(f"» ɴᴏ ᴀᴄᴛɪᴠᴇ ᴠᴏɪᴄᴇ ᴄʜᴀᴛs ᴏɴ {app.mention}.")
     else:
+        load = ", ".join(
+            f"{num} : <code>{count}</code>"
+            for num, count in sorted(sessions.load().items())
+        )
+        if load:
+            text += f"\n<b>» ᴄᴀʟʟs ᴘᴇʀ ᴀssɪsᴛᴀɴᴛ :</b> {load}"
         await mystic.edit_text(
             f"<b>» ʟɪsᴛ ᴏғ ᴄᴜʀʀᴇɴᴛʟʏ ᴀᴄᴛɪᴠᴇ ᴠᴏɪᴄᴇ ᴄʜᴀᴛs :</b>\n\n{text}",
             disable_web_page_preview=True,
@@ -2,21 +2,18 @@ import asyncio
 import os
 
 from pyrogram import filters
-from pyrogram.errors import FloodWait
 from pyrogram.types import CallbackQuery, InputMediaPhoto, Message
 
 import config
 from ShrutiMusic import app
 from ShrutiMusic.misc import db
 from ShrutiMusic.utils import AviaxBin, get_channeplayCB, seconds_to_min
-from ShrutiMusic.utils.database import get_cmode, is_active_chat, is_music_playing
+from ShrutiMusic.utils.database import get_cmode, is_active_chat
 from ShrutiMusic.utils.decorators.language import language, languageCB
 from ShrutiMusic.utils.inline import queue_back_markup, queue_markup
+from ShrutiMusic.utils.refresher import unwatch, watch
 from config import BANNED_USERS
 
-basic = {}
-
-
 def get_image(videoid):
     if os.path.isfile(f"cache/{videoid}.png"):
         return f"cache/{videoid}.png"
@@ -24,6 +21,15 @@ def get_image(videoid):
         return config.YOUTUBE_IMG_URL
 
 
+def queue_timer(_, DUR, cplay, videoid):
+    def render(track):
+        return queue_markup(
+            _, DUR, cplay, videoid, seconds_to_min(track["played"]), track["dur"]
+        )
+
+    return render
+
+
 def get_duration(playing):
     file_path = playing[0]["file"]
     if "index_" in file_path or "live_" in file_path:
@@ -96,35 +102,9 @@ async def get_queue(client, message: Message, _):
             got[0]["dur"],
         )
     )
-    basic[videoid] = True
     mystic = await message.reply_photo(IMAGE, caption=cap, reply_markup=upl)
     if DUR != "Unknown":
-        try:
-            while db[chat_id][0]["vidid"] == videoid:
-                await asyncio.sleep(5)
-                if await is_active_chat(chat_id):
-                    if basic[videoid]:
-                        if await is_music_playing(chat_id):
-                            try:
-                                buttons = queue_markup(
-                                    _,
-                                    DUR,
-                                    "c" if cplay else "g",
-                                    videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
-                                    db[chat_id][0]["dur"],
-                                )
-                                await mystic.edit_reply_markup(reply_markup=buttons)
-                            except FloodWait:
-                                pass
-                        else:
-                            pass
-                    else:
-                        break
-                else:
-                    break
-        except:
-            return
+        watch(mystic, chat_id, queue_timer(_, DUR, "c" if cplay else "g", videoid))
 
 
 @app.on_callback_query(filters.regex("GetTimer") & ~BANNED_USERS)
@@ -153,7 +133,7 @@ async def queued_tracks(client, CallbackQuery: CallbackQuery, _):
     if len(got) == 1:
         return await CallbackQuery.answer(_["queue_5"], show_alert=True)
     await CallbackQuery.answer()
-    basic[videoid] = False
+    unwatch(CallbackQuery.message)
     buttons = queue_back_markup(_, what)
     med = InputMediaPhoto(
         media="https://telegra.ph//file/6f7d35131f69951c74ee5.jpg",
@@ -236,34 +216,8 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
             got[0]["dur"],
         )
     )
-    basic[videoid] = True
 
     med = InputMediaPhoto(media=IMAGE, caption=cap)
     mystic = await CallbackQuery.edit_message_media(media=med, reply_markup=upl)
     if DUR != "Unknown":
-        try:
-            while db[chat_id][0]["vidid"] == videoid:
-                await asyncio.sleep(5)
-                if await is_active_chat(chat_id):
-                    if basic[videoid]:
-                        if await is_music_playing(chat_id):
-                            try:
-                                buttons = queue_markup(
-                                    _,
-                                    DUR,
-                                    cplay,
-                                    videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
-                                    db[chat_id][0]["dur"],
-                                )
-                                await mystic.edit_reply_markup(reply_markup=buttons)
-                            except FloodWait:
-                                pass
-                        else:
-                            pass
-                    else:
-                        break
-                else:
-                    break
-        except:
-            return
+        watch(mystic, chat_id, queue_timer(_, DUR, cplay, videoid))
@@ -7,10 +7,9 @@ from pyrogram.types import CallbackQuery, Message
 
 from ShrutiMusic import app
 from ShrutiMusic.core.call import Aviax
-from ShrutiMusic.misc import db
-from ShrutiMusic.utils.database import get_assistant, get_authuser_names, get_cmode
+from ShrutiMusic.utils.database import get_assistant, get_authusers, get_cmode
 from ShrutiMusic.utils.decorators import ActualAdminCB, AdminActual, language
-from ShrutiMusic.utils.formatters import alpha_to_int, get_readable_time
+from ShrutiMusic.utils.formatters import get_readable_time
 from config import BANNED_USERS, adminlist, lyrical
 
 rel = {}
@@ -29,16 +28,13 @@ async def reload_admin_cache(client, message: Message, _):
             if saved > time.time():
                 left = get_readable_time((int(saved) - int(time.time())))
                 return await message.reply_text(_["reload_1"].format(left))
-        adminlist[message.chat.id] = []
+        adminlist[message.chat.id] = set()
         async for user in app.get_chat_members(
             message.chat.id, filter=ChatMembersFilter.ADMINISTRATORS
         ):
             if user.privileges.can_manage_video_chats:
-                adminlist[message.chat.id].append(user.user.id)
-        authusers = await get_authuser_names(message.chat.id)
-        for user in authusers:
-            user_id = await alpha_to_int(user)
-            adminlist[message.chat.id].append(user_id)
+                adminlist[message.chat.id].add(user.user.id)
+        adminlist[message.chat.id] |= await get_authusers(message.chat.id)
         now = int(time.time()) + 180
         rel[message.chat.id] = now
         await message.reply_text(_["reload_2"])
@@ -52,7 +48,6 @@ async def restartbot(client, message: Message, _):
     mystic = await message.reply_text(_["reload_4"].format(app.mention))
     await asyncio.sleep(1)
     try:
-        db[message.chat.id] = []
         await Aviax.stop_stream_force(message.chat.id)
     except:
         pass
@@ -79,7 +74,6 @@ async def restartbot(client, message: Message, _):
         except:
             pass
         try:
-            db[chat_id] = []
             await Aviax.stop_stream_force(chat_id)
         except:
             pass
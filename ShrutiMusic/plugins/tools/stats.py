@@ -10,12 +10,14 @@ from pytgcalls.__version__ import __version__ as pytgver
 
 import config
 from ShrutiMusic import app
+from ShrutiMusic.core.admission import admission
 from ShrutiMusic.core.userbot import assistants
 from ShrutiMusic.misc import SUDOERS, mongodb
 from ShrutiMusic.plugins import ALL_MODULES
-from ShrutiMusic.utils.database import get_served_chats, get_served_users, get_sudoers,is_autoend,is_autoleave
+from ShrutiMusic.utils.database import get_served_chats_count, get_served_users_count, get_sudoers,is_autoend,is_autoleave
 from ShrutiMusic.utils.decorators.language import language, languageCB
 from ShrutiMusic.utils.inline.stats import back_stats_buttons, stats_buttons
+from ShrutiMusic.utils.thumbnails import renderer
 from config import BANNED_USERS
 
 
@@ -50,8 +52,8 @@ async def overall_stats(client, CallbackQuery, _):
     except:
         pass
     await CallbackQuery.edit_message_text(_["gstats_1"].format(app.mention))
-    served_chats = len(await get_served_chats())
-    served_users = len(await get_served_users())
+    served_chats = await get_served_chats_count()
+    served_users = await get_served_users_count()
     text = _["gstats_3"].format(
         app.mention,
         len(assistants),
@@ -64,6 +66,8 @@ async def overall_stats(client, CallbackQuery, _):
         config.DURATION_LIMIT_MIN,
         await is_autoleave()  
     )
+    text += admission.status(_)
+    text += renderer.status(_)
     med = InputMediaPhoto(media=config.STATS_IMG_URL, caption=text)
     try:
         await CallbackQuery.edit_message_media(media=med, reply_markup=upl)
@@ -102,8 +106,8 @@ async def bot_stats(client, CallbackQuery, _):
     call = await mongodb.command("dbstats")
     datasize = call["dataSize"] / 1024
     storage = call["storageSize"] / 1024
-    served_chats = len(await get_served_chats())
-    served_users = len(await get_served_users())
+    served_chats = await get_served_chats_count()
+    served_users = await get_served_users_count()
     text = _["gstats_5"].format(
         app.mention,
         len(ALL_MODULES),
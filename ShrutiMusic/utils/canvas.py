@@ -0,0 +1,162 @@
+import random
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# Only PIL and numpy here: the renderer threads and the benchmark load it alone.
+
+WIDTH, HEIGHT = 1280, 720
+# The blurred cover is darkened to 60%, then blended 20% with the gradient.
+DIM = 0.6 * 0.8
+TINT = 0.2
+WHITE = (255, 255, 255)
+TEXT_X = 565
+BAR_LENGTH = 580
+
+_fonts = threading.local()
+
+
+def load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    # FreeType faces are not thread-safe, so every renderer thread loads its own.
+    cache = getattr(_fonts, "cache", None)
+    if cache is None:
+        cache = _fonts.cache = {}
+    loaded = cache.get((path, size))
+    if loaded is None:
+        loaded = cache[(path, size)] = ImageFont.truetype(path, size)
+    return loaded
+
+
+def truncate(text: str) -> list:
+    text1 = ""
+    text2 = ""
+    for word in text.split(" "):
+        if len(text1) + len(word) < 30:
+            text1 += " " + word
+        elif len(text2) + len(word) < 30:
+            text2 += " " + word
+    return [text1.strip(), text2.strip()]
+
+
+def random_color() -> tuple:
+    return (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+
+
+@lru_cache(maxsize=8)
+def gradient_lut(height: int) -> np.ndarray:
+    # Weight of the end colour on each row, rising to 60/255 at the bottom.
+    lut = (60 * np.arange(height) // height).astype(np.float32) / 255
+    lut = lut[:, None]
+    lut.setflags(write=False)
+    return lut
+
+
+def gradient(height: int, start: tuple, end: tuple) -> np.ndarray:
+    start = np.asarray(start[:3], np.float32)
+    end = np.asarray(end[:3], np.float32)
+    return start + (end - start) * gradient_lut(height)
+
+
+@lru_cache(maxsize=8)
+def circle_mask(size: int) -> Image.Image:
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+    return mask
+
+
+@lru_cache(maxsize=4)
+def play_icons(width: int, height: int) -> Image.Image:
+    return Image.open("ShrutiMusic/assets/play_icons.png").resize((width, height))
+
+
+def backdrop(image: Image.Image, start: tuple, end: tuple) -> Image.Image:
+    blurred = image.resize((WIDTH, HEIGHT)).filter(ImageFilter.BoxBlur(20))
+    pixels = np.asarray(blurred, np.float32) * DIM
+    pixels += (TINT * gradient(HEIGHT, start, end))[:, None, :]
+    return Image.fromarray(pixels.astype(np.uint8), "RGB")
+
+
+def crop_center_circle(img, output_size, border, border_color, crop_scale=1.5):
+    half_the_width = img.size[0] / 2
+    half_the_height = img.size[1] / 2
+    larger_size = int(output_size * crop_scale)
+    inner = output_size - 2 * border
+    img = img.crop(
+        (
+            half_the_width - larger_size / 2,
+            half_the_height - larger_size / 2,
+            half_the_width + larger_size / 2,
+            half_the_height + larger_size / 2,
+        )
+    ).resize((inner, inner))
+    result = Image.new("RGBA", (output_size, output_size), border_color)
+    result.paste(img, (border, border), circle_mask(inner))
+    result.putalpha(circle_mask(output_size))
+    return result
+
+
+def draw_text_with_shadow(
+    background, draw, position, text, font, fill, shadow_offset=(3, 3), shadow_blur=5
+):
+    if not text:
+        return
+    # Only the box around the text is blurred; 3 radii hold all of the shadow.
+    margin = 3 * shadow_blur
+    left, top, right, bottom = map(int, draw.textbbox(position, text, font=font))
+    left, top = left - margin, top - margin
+    shadow = Image.new("L", (right + margin - left, bottom + margin - top), 0)
+    ImageDraw.Draw(shadow).text(
+        (position[0] - left, position[1] - top), text, font=font, fill=255
+    )
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=shadow_blur))
+    background.paste(
+        (0, 0, 0), (left + shadow_offset[0], top + shadow_offset[1]), shadow
+    )
+    draw.text(position, text, font=font, fill=fill)
+
+
+def _progress(draw, duration: str):
+    y = 380
+    radius = 10
+    if duration != "Live":
+        line_color = random_color()
+        played = int(BAR_LENGTH * random.uniform(0.15, 0.85))
+    else:
+        line_color = (255, 0, 0)
+        played = BAR_LENGTH
+    x = TEXT_X + played
+    draw.line([(TEXT_X, y), (x, y)], fill=line_color, width=9)
+    if played < BAR_LENGTH:
+        draw.line([(x, y), (TEXT_X + BAR_LENGTH, y)], fill="white", width=8)
+    draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=line_color)
+
+
+def compose(source: Image.Image, title: str, duration: str, views: str, channel: str):
+    """Lays out the now-playing card over a cover and returns it as RGB."""
+    source = source.convert("RGB")
+    start_gradient_color = random_color()
+    end_gradient_color = random_color()
+    background = backdrop(source, start_gradient_color, end_gradient_color)
+
+    circle_thumbnail = crop_center_circle(source, 400, 20, start_gradient_color)
+    background.paste(circle_thumbnail, (120, 160), circle_thumbnail)
+
+    draw = ImageDraw.Draw(background)
+    arial = load_font("ShrutiMusic/assets/font2.ttf", 30)
+    title_font = load_font("ShrutiMusic/assets/font3.ttf", 45)
+    title1 = truncate(title)
+    for y, line in ((180, title1[0]), (230, title1[1])):
+        draw_text_with_shadow(background, draw, (TEXT_X, y), line, title_font, WHITE)
+    draw_text_with_shadow(
+        background, draw, (TEXT_X, 320), f"{channel}  |  {views[:23]}", arial, WHITE
+    )
+
+    _progress(draw, duration)
+    draw_text_with_shadow(background, draw, (TEXT_X, 400), "00:00", arial, WHITE)
+    draw_text_with_shadow(background, draw, (1080, 400), duration, arial, WHITE)
+
+    icons = play_icons(BAR_LENGTH, 62)
+    background.paste(icons, (TEXT_X, 450), icons)
+    return background
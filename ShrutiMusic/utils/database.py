@@ -1,10 +1,20 @@
 import random
 import asyncio
+import time
 from datetime import date
-from typing import Dict, List, Union
+from typing import AsyncIterator, Dict, Set
 
+from pymongo import UpdateOne
+
+import config
 from ShrutiMusic import userbot
+from ShrutiMusic.core.bus import bus
+from ShrutiMusic.core.cache import MISSING, SettingsCache
 from ShrutiMusic.core.mongo import mongodb
+from ShrutiMusic.core.session import sessions
+from ShrutiMusic.logging import LOGGER
+from ShrutiMusic.misc import SUDOERS
+from ShrutiMusic.utils.formatters import alpha_to_int
 
 authdb = mongodb.adminauth
 authuserdb = mongodb.authuser
@@ -15,10 +25,12 @@ blacklist_chatdb = mongodb.blacklistChat
 blockeddb = mongodb.blockedusers
 chatsdb = mongodb.chats
 chatdb = mongodb.chat
+chatsettingsdb = mongodb.chat_settings
 channeldb = mongodb.cplaymode
 countdb = mongodb.upcount
 gbansdb = mongodb.gban
 langdb = mongodb.language
+migrationsdb = mongodb.migrations
 onoffdb = mongodb.onoffper
 playmodedb = mongodb.playmode
 playtypedb = mongodb.playtypedb
@@ -26,22 +38,180 @@ skipdb = mongodb.skipmode
 sudoersdb = mongodb.sudoers
 usersdb = mongodb.tgusersdb
 
+# Keys the hot lookups filter on, each with a unique index.
+INDEXES = (
+    (usersdb, "user_id"),
+    (chatsdb, "chat_id"),
+    (gbansdb, "user_id"),
+    (blockeddb, "user_id"),
+    (blacklist_chatdb, "chat_id"),
+    (authuserdb, "chat_id"),
+    (sudoersdb, "sudo"),
+)
+
 # Shifting to memory [mongo sucks often]
-active = []
-activevideo = []
 assistantdict = {}
-autoend = {}
-autoleave = {}
-count = {}
-channelconnect = {}
-langm = {}
-loop = {}
-maintenance = []
-nonadmin = {}
-pause = {}
-playmode = {}
-playtype = {}
-skipmode = {}
+# Global switches by flag (an on_off number, "autoend" or "autoleave").
+flags = {}
+# Ids known to be stored, filled as they are seen up to SERVED_CACHE_SIZE each,
+# and ids waiting for the writer.
+served_users = set()
+served_chats = set()
+pending_users = set()
+pending_chats = set()
+# Ban lists and chat blacklist, authoritative once load_bans() ran. BANNED_USERS
+# is the union of both ban lists.
+gbanned = set()
+banned = set()
+blacklist = set()
+# Documents fetched per round-trip by the id scans.
+SCAN_BATCH = 1000
+
+# Fields of a chat_settings document and their value when never set.
+CHAT_SETTINGS = {
+    "lang": "en",
+    "playmode": "Direct",
+    "playtype": "Everyone",
+    "cmode": None,
+    "skipmode": True,
+    "upvotes": 5,
+    "nonadmin": False,
+    "assistant": None,
+}
+chatsettings: SettingsCache[dict] = SettingsCache(
+    config.SETTINGS_CACHE_SIZE, config.SETTINGS_CACHE_TTL
+)
+authusers: SettingsCache[Set[int]] = SettingsCache(
+    config.SETTINGS_CACHE_SIZE, config.SETTINGS_CACHE_TTL
+)
+
+
+async def get_chat_settings(chat_id: int) -> dict:
+    record = chatsettings.get(chat_id)
+    if record is MISSING:
+        doc = await chatsettingsdb.find_one(
+            {"_id": chat_id}, {field: 1 for field in CHAT_SETTINGS}
+        )
+        doc = doc or {}
+        record = {
+            field: doc.get(field, value) for field, value in CHAT_SETTINGS.items()
+        }
+        chatsettings.set(chat_id, record)
+    return record
+
+
+async def _set_chat_setting(chat_id: int, field: str, value):
+    await chatsettingsdb.update_one(
+        {"_id": chat_id}, {"$set": {field: value}}, upsert=True
+    )
+    record = chatsettings.get(chat_id)
+    if record is not MISSING:
+        record[field] = value
+    await bus.publish("settings", chat_id)
+
+
+# Collections the chat settings were spread over, as (collection, key, field).
+LEGACY_SETTINGS = (
+    (langdb, "lang", "lang"),
+    (playmodedb, "mode", "playmode"),
+    (playtypedb, "mode", "playtype"),
+    (channeldb, "mode", "cmode"),
+    (countdb, "mode", "upvotes"),
+    (assdb, "assistant", "assistant"),
+)
+
+
+async def migrate_chat_settings() -> int:
+    if await migrationsdb.find_one({"_id": "chat_settings"}):
+        return 0
+    records = {}
+    for collection, key, field in LEGACY_SETTINGS:
+        async for doc in collection.find({key: {"$exists": True}}):
+            if doc.get("chat_id") is not None:
+                records.setdefault(doc["chat_id"], {})[field] = doc[key]
+    # Both flags were stored as the presence of a document.
+    for collection, field, value in (
+        (skipdb, "skipmode", False),
+        (authdb, "nonadmin", True),
+    ):
+        async for doc in collection.find({}, {"chat_id": 1}):
+            if doc.get("chat_id") is not None:
+                records.setdefault(doc["chat_id"], {})[field] = value
+    if records:
+        await chatsettingsdb.bulk_write(
+            [
+                UpdateOne({"_id": chat_id}, {"$set": fields}, upsert=True)
+                for chat_id, fields in records.items()
+            ],
+            ordered=False,
+        )
+    await migrationsdb.update_one(
+        {"_id": "chat_settings"},
+        {"$set": {"chats": len(records), "at": time.time()}},
+        upsert=True,
+    )
+    chatsettings.clear()
+    return len(records)
+
+
+async def _dedupe(collection, key: str) -> int:
+    # Sorted by id, every copy after the first of an id is dropped.
+    extra = []
+    last = None
+    async for doc in collection.find(
+        {},
+        {"_id": 1, key: 1},
+        sort=[(key, 1)],
+        batch_size=SCAN_BATCH,
+        allow_disk_use=True,
+    ):
+        if doc.get(key) == last:
+            extra.append(doc["_id"])
+        last = doc.get(key)
+    for _id in extra:
+        await collection.delete_one({"_id": _id})
+    return len(extra)
+
+
+async def ensure_indexes():
+    for collection, key in INDEXES:
+        try:
+            try:
+                await collection.create_index(key, unique=True)
+            except Exception:
+                # Served ids saved before the index existed may be stored twice,
+                # which fails the build; those documents hold nothing but the id.
+                if collection not in (usersdb, chatsdb):
+                    raise
+                removed = await _dedupe(collection, key)
+                LOGGER(__name__).info(
+                    f"Removed {removed} duplicates from {collection.name}.{key}"
+                )
+                await collection.create_index(key, unique=True)
+        except Exception as e:
+            LOGGER(__name__).warning(
+                f"No unique index on {collection.name}.{key}: {e}"
+            )
+
+
+async def warm_chat_settings() -> int:
+    # One scan fills the assistants and as many settings records as fit the cache.
+    loaded = 0
+    async for doc in chatsettingsdb.find(
+        {}, {field: 1 for field in CHAT_SETTINGS}, batch_size=SCAN_BATCH
+    ):
+        if doc.get("assistant"):
+            assistantdict[doc["_id"]] = doc["assistant"]
+        if loaded < chatsettings.maxsize:
+            chatsettings.set(
+                doc["_id"],
+                {
+                    field: doc.get(field, value)
+                    for field, value in CHAT_SETTINGS.items()
+                },
+            )
+            loaded += 1
+    return loaded
 
 
 async def get_assistant_number(chat_id: int) -> str:
@@ -64,23 +234,23 @@ async def get_client(assistant: int):
 
 async def set_assistant_new(chat_id, number):
     number = int(number)
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": number}},
-        upsert=True,
-    )
+    assistantdict[chat_id] = number
+    await _set_chat_setting(chat_id, "assistant", number)
 
 
-async def set_assistant(chat_id):
+def _pick_assistant() -> int:
     from ShrutiMusic.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
+    # New chats go to one of the assistants carrying the fewest calls.
+    load = sessions.load()
+    least = min(load.get(num, 0) for num in assistants)
+    return random.choice([num for num in assistants if load.get(num, 0) == least])
+
+
+async def set_assistant(chat_id):
+    ran_assistant = _pick_assistant()
     assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    await _set_chat_setting(chat_id, "assistant", ran_assistant)
     userbot = await get_client(ran_assistant)
     return userbot
 
@@ -90,61 +260,32 @@ async def get_assistant(chat_id: int) -> str:
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
-            userbot = await set_assistant(chat_id)
-            return userbot
-        else:
-            got_assis = dbassistant["assistant"]
-            if got_assis in assistants:
-                assistantdict[chat_id] = got_assis
-                userbot = await get_client(got_assis)
-                return userbot
-            else:
-                userbot = await set_assistant(chat_id)
-                return userbot
-    else:
-        if assistant in assistants:
-            userbot = await get_client(assistant)
-            return userbot
-        else:
-            userbot = await set_assistant(chat_id)
-            return userbot
+        assistant = (await get_chat_settings(chat_id))["assistant"]
+    if assistant not in assistants:
+        userbot = await set_assistant(chat_id)
+        return userbot
+    assistantdict[chat_id] = assistant
+    userbot = await get_client(assistant)
+    return userbot
 
 
 async def set_calls_assistant(chat_id):
-    from ShrutiMusic.core.userbot import assistants
-
-    ran_assistant = random.choice(assistants)
+    ran_assistant = _pick_assistant()
     assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    await _set_chat_setting(chat_id, "assistant", ran_assistant)
     return ran_assistant
 
 
 async def group_assistant(self, chat_id: int) -> int:
     from ShrutiMusic.core.userbot import assistants
 
-    assistant = assistantdict.get(chat_id)
-    if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
-            assis = await set_calls_assistant(chat_id)
-        else:
-            assis = dbassistant["assistant"]
-            if assis in assistants:
-                assistantdict[chat_id] = assis
-                assis = assis
-            else:
-                assis = await set_calls_assistant(chat_id)
+    assis = assistantdict.get(chat_id)
+    if not assis:
+        assis = (await get_chat_settings(chat_id))["assistant"]
+    if assis in assistants:
+        assistantdict[chat_id] = assis
     else:
-        if assistant in assistants:
-            assis = assistant
-        else:
-            assis = await set_calls_assistant(chat_id)
+        assis = await set_calls_assistant(chat_id)
     if int(assis) == 1:
         return self.one
     elif int(assis) == 2:
@@ -158,454 +299,477 @@ async def group_assistant(self, chat_id: int) -> int:
 
 
 async def is_skipmode(chat_id: int) -> bool:
-    mode = skipmode.get(chat_id)
-    if not mode:
-        user = await skipdb.find_one({"chat_id": chat_id})
-        if not user:
-            skipmode[chat_id] = True
-            return True
-        skipmode[chat_id] = False
-        return False
-    return mode
+    return (await get_chat_settings(chat_id))["skipmode"]
 
 
 async def skip_on(chat_id: int):
-    skipmode[chat_id] = True
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if user:
-        return await skipdb.delete_one({"chat_id": chat_id})
+    await _set_chat_setting(chat_id, "skipmode", True)
 
 
 async def skip_off(chat_id: int):
-    skipmode[chat_id] = False
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await skipdb.insert_one({"chat_id": chat_id})
+    await _set_chat_setting(chat_id, "skipmode", False)
 
 
 async def get_upvote_count(chat_id: int) -> int:
-    mode = count.get(chat_id)
-    if not mode:
-        mode = await countdb.find_one({"chat_id": chat_id})
-        if not mode:
-            return 5
-        count[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["upvotes"]
 
 
 async def set_upvotes(chat_id: int, mode: int):
-    count[chat_id] = mode
-    await countdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_setting(chat_id, "upvotes", mode)
+
+
+# Flags stored in their own collection, the others are on_off numbers.
+FLAG_DOCS = {
+    "autoend": (autoenddb, {"chat_id": 1234}),
+    "autoleave": (autoleavedb, {"chat_id": 1234}),
+}
+# Flags read on every play or loop tick, loaded at startup.
+GLOBAL_FLAGS = (1, 2, "autoend", "autoleave")
+
+
+def _flag_doc(flag):
+    return FLAG_DOCS.get(flag) or (onoffdb, {"on_off": flag})
+
+
+async def _read_flag(flag) -> bool:
+    collection, query = _flag_doc(flag)
+    value = bool(await collection.find_one(query))
+    flags[flag] = value
+    return value
+
+
+async def _get_flag(flag) -> bool:
+    value = flags.get(flag)
+    if value is None:
+        value = await _read_flag(flag)
+    return value
+
+
+async def _set_flag(flag, value: bool):
+    collection, query = _flag_doc(flag)
+    if value:
+        await collection.update_one(query, {"$set": query}, upsert=True)
+    else:
+        await collection.delete_many(query)
+    flags[flag] = value
+    await bus.publish("flag", flag)
+
+
+async def load_flags():
+    await asyncio.gather(*(_read_flag(flag) for flag in {*GLOBAL_FLAGS, *flags}))
+
+
+async def flags_refresher():
+    # Picks up switches flipped by other instances sharing the database.
+    while not await asyncio.sleep(config.FLAGS_REFRESH_INTERVAL):
+        try:
+            await load_flags()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to refresh the global flags: {e}")
 
 
 async def is_autoend() -> bool:
-    chat_id = 1234
-    user = await autoenddb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await _get_flag("autoend")
 
 
 async def autoend_on():
-    chat_id = 1234
-    await autoenddb.insert_one({"chat_id": chat_id})
+    await _set_flag("autoend", True)
 
 
 async def autoend_off():
-    chat_id = 1234
-    await autoenddb.delete_one({"chat_id": chat_id})
+    await _set_flag("autoend", False)
 
 async def is_autoleave() -> bool:
-    chat_id = 1234
-    user = await autoleavedb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await _get_flag("autoleave")
 
 
 async def autoleave_on():
-    chat_id = 1234
-    await autoleavedb.insert_one({"chat_id": chat_id})
+    await _set_flag("autoleave", True)
 
 
 async def autoleave_off():
-    chat_id = 1234
-    await autoleavedb.delete_one({"chat_id": chat_id})
+    await _set_flag("autoleave", False)
 
 
 async def get_loop(chat_id: int) -> int:
-    lop = loop.get(chat_id)
-    if not lop:
+    session = sessions.get(chat_id)
+    if not session:
         return 0
-    return lop
+    return session.loop
 
 
 async def set_loop(chat_id: int, mode: int):
-    loop[chat_id] = mode
+    session = sessions.open(chat_id) if mode else sessions.get(chat_id)
+    if session:
+        session.loop = mode
 
 
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["cmode"]
 
 
 async def set_cmode(chat_id: int, mode: int):
-    channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_setting(chat_id, "cmode", mode)
 
 
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["playtype"]
 
 
 async def set_playtype(chat_id: int, mode: str):
-    playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_setting(chat_id, "playtype", mode)
 
 
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["playmode"]
 
 
 async def set_playmode(chat_id: int, mode: str):
-    playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_setting(chat_id, "playmode", mode)
 
 
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "en"
-            return "en"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    return (await get_chat_settings(chat_id))["lang"]
 
 
 async def set_lang(chat_id: int, lang: str):
-    langm[chat_id] = lang
-    await langdb.update_one({"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True)
+    await _set_chat_setting(chat_id, "lang", lang)
 
 
 async def is_music_playing(chat_id: int) -> bool:
-    mode = pause.get(chat_id)
-    if not mode:
+    session = sessions.get(chat_id)
+    if not session:
         return False
-    return mode
+    return session.playing
 
 
 async def music_on(chat_id: int):
-    pause[chat_id] = True
+    sessions.open(chat_id).playing = True
 
 
 async def music_off(chat_id: int):
-    pause[chat_id] = False
+    session = sessions.get(chat_id)
+    if session:
+        session.playing = False
 
 
 async def get_active_chats() -> list:
-    return active
+    return sessions.active()
 
 
 async def is_active_chat(chat_id: int) -> bool:
-    if chat_id not in active:
-        return False
-    else:
-        return True
+    return sessions.is_active(chat_id)
 
 
 async def add_active_chat(chat_id: int):
-    if chat_id not in active:
-        active.append(chat_id)
+    sessions.activate(chat_id, assistantdict.get(chat_id))
 
 
 async def remove_active_chat(chat_id: int):
-    if chat_id in active:
-        active.remove(chat_id)
+    sessions.deactivate(chat_id)
 
 
 async def get_active_video_chats() -> list:
-    return activevideo
+    return sessions.active(video=True)
 
 
 async def is_active_video_chat(chat_id: int) -> bool:
-    if chat_id not in activevideo:
-        return False
-    else:
-        return True
+    return sessions.is_video(chat_id)
 
 
 async def add_active_video_chat(chat_id: int):
-    if chat_id not in activevideo:
-        activevideo.append(chat_id)
+    sessions.set_video(chat_id, True)
 
 
 async def remove_active_video_chat(chat_id: int):
-    if chat_id in activevideo:
-        activevideo.remove(chat_id)
-
-
-async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    sessions.set_video(chat_id, False)
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    return (await get_chat_settings(chat_id))["nonadmin"]
 
 
 async def add_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
-        return
-    return await authdb.insert_one({"chat_id": chat_id})
+    await _set_chat_setting(chat_id, "nonadmin", True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
-        return
-    return await authdb.delete_one({"chat_id": chat_id})
+    await _set_chat_setting(chat_id, "nonadmin", False)
 
 
 async def is_on_off(on_off: int) -> bool:
-    onoff = await onoffdb.find_one({"on_off": on_off})
-    if not onoff:
-        return False
-    return True
+    return await _get_flag(on_off)
 
 
 async def add_on(on_off: int):
-    is_on = await is_on_off(on_off)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": on_off})
+    await _set_flag(on_off, True)
 
 
 async def add_off(on_off: int):
-    is_off = await is_on_off(on_off)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": on_off})
+    await _set_flag(on_off, False)
 
 
 async def is_maintenance():
-    if not maintenance:
-        get = await onoffdb.find_one({"on_off": 1})
-        if not get:
-            maintenance.clear()
-            maintenance.append(2)
-            return True
-        else:
-            maintenance.clear()
-            maintenance.append(1)
-            return False
-    else:
-        if 1 in maintenance:
-            return False
-        else:
-            return True
+    # False while maintenance is on, i.e. while on_off 1 is set.
+    return not await _get_flag(1)
 
 
 async def maintenance_off():
-    maintenance.clear()
-    maintenance.append(2)
-    is_off = await is_on_off(1)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": 1})
+    await _set_flag(1, False)
 
 
 async def maintenance_on():
-    maintenance.clear()
-    maintenance.append(1)
-    is_on = await is_on_off(1)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": 1})
+    await _set_flag(1, True)
+
+
+async def _scan(collection, key: str, query: dict) -> AsyncIterator[int]:
+    # Pages by key with a fresh query each: broadcasts and gbans sleep between
+    # ids, and the server drops a cursor left idle that long.
+    cond = dict(query.get(key) or {})
+    while True:
+        docs = await collection.find(
+            {**query, key: cond},
+            {"_id": 0, key: 1},
+            sort=[(key, 1)],
+            limit=SCAN_BATCH,
+        ).to_list(SCAN_BATCH)
+        for doc in docs:
+            yield doc[key]
+        if len(docs) < SCAN_BATCH:
+            return
+        cond = {**cond, "$gt": docs[-1][key]}
+
+
+def iter_served_users() -> AsyncIterator[int]:
+    return _scan(usersdb, "user_id", {"user_id": {"$gt": 0}})
+
+
+def iter_served_chats() -> AsyncIterator[int]:
+    return _scan(chatsdb, "chat_id", {"chat_id": {"$lt": 0}})
+
+
+def iter_gbanned() -> AsyncIterator[int]:
+    return _scan(gbansdb, "user_id", {"user_id": {"$gt": 0}})
+
+
+def iter_banned_users() -> AsyncIterator[int]:
+    return _scan(blockeddb, "user_id", {"user_id": {"$gt": 0}})
+
+
+def iter_blacklisted_chats() -> AsyncIterator[int]:
+    return _scan(blacklist_chatdb, "chat_id", {"chat_id": {"$lt": 0}})
+
+
+async def get_served_users_count() -> int:
+    return await usersdb.count_documents({"user_id": {"$gt": 0}})
+
+
+async def get_served_chats_count() -> int:
+    return await chatsdb.count_documents({"chat_id": {"$lt": 0}})
+
+
+def _remember(seen: set, value: int):
+    if len(seen) >= config.SERVED_CACHE_SIZE:
+        seen.pop()
+    seen.add(value)
 
 
 async def is_served_user(user_id: int) -> bool:
+    if user_id in served_users:
+        return True
     user = await usersdb.find_one({"user_id": user_id})
     if not user:
         return False
+    _remember(served_users, user_id)
     return True
 
 
 async def get_served_users() -> list:
-    users_list = []
-    async for user in usersdb.find({"user_id": {"$gt": 0}}):
-        users_list.append(user)
-    return users_list
+    return [{"user_id": user_id} async for user_id in iter_served_users()]
 
 
 async def add_served_user(user_id: int):
-    is_served = await is_served_user(user_id)
-    if is_served:
+    if user_id in served_users:
         return
-    return await usersdb.insert_one({"user_id": user_id})
+    _remember(served_users, user_id)
+    pending_users.add(user_id)
 
 
 async def get_served_chats() -> list:
-    chats_list = []
-    async for chat in chatsdb.find({"chat_id": {"$lt": 0}}):
-        chats_list.append(chat)
-    return chats_list
+    return [{"chat_id": chat_id} async for chat_id in iter_served_chats()]
 
 
 async def is_served_chat(chat_id: int) -> bool:
+    if chat_id in served_chats:
+        return True
     chat = await chatsdb.find_one({"chat_id": chat_id})
     if not chat:
         return False
+    _remember(served_chats, chat_id)
     return True
 
 
 async def add_served_chat(chat_id: int):
-    is_served = await is_served_chat(chat_id)
-    if is_served:
+    if chat_id in served_chats:
+        return
+    _remember(served_chats, chat_id)
+    pending_chats.add(chat_id)
+
+
+async def _flush_served(collection, key: str, pending: set):
+    if not pending:
         return
-    return await chatsdb.insert_one({"chat_id": chat_id})
+    ids = list(pending)
+    pending.clear()
+    try:
+        await collection.bulk_write(
+            [
+                UpdateOne({key: x}, {"$setOnInsert": {key: x}}, upsert=True)
+                for x in ids
+            ],
+            ordered=False,
+        )
+    except Exception:
+        pending.update(ids)
+        raise
+
+
+async def flush_served():
+    await _flush_served(usersdb, "user_id", pending_users)
+    await _flush_served(chatsdb, "chat_id", pending_chats)
+
+
+async def served_writer():
+    while not await asyncio.sleep(config.SERVED_FLUSH_INTERVAL):
+        try:
+            await flush_served()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to save served users/chats: {e}")
 
 
 async def blacklisted_chats() -> list:
-    chats_list = []
-    async for chat in blacklist_chatdb.find({"chat_id": {"$lt": 0}}):
-        chats_list.append(chat["chat_id"])
-    return chats_list
+    return list(blacklist)
+
+
+async def is_blacklisted_chat(chat_id: int) -> bool:
+    return chat_id in blacklist
+
+
+async def _insert_id(collection, key: str, value: int) -> bool:
+    result = await collection.update_one(
+        {key: value}, {"$setOnInsert": {key: value}}, upsert=True
+    )
+    await bus.publish(collection.name, value)
+    return result.upserted_id is not None
+
+
+async def _delete_id(collection, key: str, value: int) -> bool:
+    result = await collection.delete_many({key: value})
+    await bus.publish(collection.name, value)
+    return result.deleted_count > 0
+
+
+def _sync_banned(user_id: int):
+    if user_id in gbanned or user_id in banned:
+        config.BANNED_USERS.add(user_id)
+    else:
+        config.BANNED_USERS.discard(user_id)
+
+
+async def load_bans():
+    gbanned.update([user_id async for user_id in iter_gbanned()])
+    banned.update([user_id async for user_id in iter_banned_users()])
+    blacklist.update([chat_id async for chat_id in iter_blacklisted_chats()])
+    config.BANNED_USERS.update(gbanned | banned)
 
 
 async def blacklist_chat(chat_id: int) -> bool:
-    if not await blacklist_chatdb.find_one({"chat_id": chat_id}):
-        await blacklist_chatdb.insert_one({"chat_id": chat_id})
-        return True
-    return False
+    blacklist.add(chat_id)
+    return await _insert_id(blacklist_chatdb, "chat_id", chat_id)
 
 
 async def whitelist_chat(chat_id: int) -> bool:
-    if await blacklist_chatdb.find_one({"chat_id": chat_id}):
-        await blacklist_chatdb.delete_one({"chat_id": chat_id})
-        return True
-    return False
+    blacklist.discard(chat_id)
+    return await _delete_id(blacklist_chatdb, "chat_id", chat_id)
 
 
-async def _get_authusers(chat_id: int) -> Dict[str, int]:
-    _notes = await authuserdb.find_one({"chat_id": chat_id})
-    if not _notes:
-        return {}
-    return _notes["notes"]
+async def get_authuser_notes(chat_id: int) -> Dict[int, dict]:
+    doc = await authuserdb.find_one({"chat_id": chat_id}, {"_id": 0, "users": 1})
+    users = (doc or {}).get("users") or {}
+    notes = {int(user_id): note for user_id, note in users.items()}
+    authusers.set(chat_id, set(notes))
+    return notes
 
 
-async def get_authuser_names(chat_id: int) -> List[str]:
-    _notes = []
-    for note in await _get_authusers(chat_id):
-        _notes.append(note)
-    return _notes
+async def get_authusers(chat_id: int) -> Set[int]:
+    users = authusers.get(chat_id)
+    if users is MISSING:
+        users = set(await get_authuser_notes(chat_id))
+    return users
 
 
-async def get_authuser(chat_id: int, name: str) -> Union[bool, dict]:
-    name = name
-    _notes = await _get_authusers(chat_id)
-    if name in _notes:
-        return _notes[name]
-    else:
-        return False
+async def is_authuser(chat_id: int, user_id: int) -> bool:
+    return user_id in await get_authusers(chat_id)
 
 
-async def save_authuser(chat_id: int, name: str, note: dict):
-    name = name
-    _notes = await _get_authusers(chat_id)
-    _notes[name] = note
-
+async def save_authuser(chat_id: int, user_id: int, note: dict):
     await authuserdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"notes": _notes}}, upsert=True
+        {"chat_id": chat_id}, {"$set": {f"users.{user_id}": note}}, upsert=True
     )
+    users = authusers.get(chat_id)
+    if users is not MISSING:
+        users.add(user_id)
+    await bus.publish("authusers", chat_id)
 
 
-async def delete_authuser(chat_id: int, name: str) -> bool:
-    notesd = await _get_authusers(chat_id)
-    name = name
-    if name in notesd:
-        del notesd[name]
-        await authuserdb.update_one(
-            {"chat_id": chat_id},
-            {"$set": {"notes": notesd}},
-            upsert=True,
-        )
-        return True
-    return False
+async def delete_authuser(chat_id: int, user_id: int) -> bool:
+    field = f"users.{user_id}"
+    result = await authuserdb.update_one(
+        {"chat_id": chat_id, field: {"$exists": True}}, {"$unset": {field: ""}}
+    )
+    users = authusers.get(chat_id)
+    if users is not MISSING:
+        users.discard(user_id)
+    await bus.publish("authusers", chat_id)
+    return bool(result.modified_count)
+
+
+async def migrate_authusers() -> int:
+    # Auth users used to be one "notes" dict keyed by the id spelled in letters.
+    ops = []
+    async for doc in authuserdb.find({"notes": {"$exists": True}}):
+        users = {}
+        for token, note in (doc["notes"] or {}).items():
+            user_id = note.get("auth_user_id") or await alpha_to_int(token)
+            users[f"users.{int(user_id)}"] = note
+        update = {"$unset": {"notes": ""}}
+        if users:
+            update["$set"] = users
+        ops.append(UpdateOne({"_id": doc["_id"]}, update))
+    if ops:
+        await authuserdb.bulk_write(ops, ordered=False)
+        authusers.clear()
+    return len(ops)
 
 
 async def get_gbanned() -> list:
-    results = []
-    async for user in gbansdb.find({"user_id": {"$gt": 0}}):
-        user_id = user["user_id"]
-        results.append(user_id)
-    return results
+    return [user_id async for user_id in iter_gbanned()]
 
 
 async def is_gbanned_user(user_id: int) -> bool:
-    user = await gbansdb.find_one({"user_id": user_id})
-    if not user:
-        return False
-    return True
+    return user_id in gbanned
 
 
 async def add_gban_user(user_id: int):
-    is_gbanned = await is_gbanned_user(user_id)
-    if is_gbanned:
-        return
-    return await gbansdb.insert_one({"user_id": user_id})
+    gbanned.add(user_id)
+    _sync_banned(user_id)
+    return await _insert_id(gbansdb, "user_id", user_id)
 
 
 async def remove_gban_user(user_id: int):
-    is_gbanned = await is_gbanned_user(user_id)
-    if not is_gbanned:
-        return
-    return await gbansdb.delete_one({"user_id": user_id})
+    gbanned.discard(user_id)
+    _sync_banned(user_id)
+    return await _delete_id(gbansdb, "user_id", user_id)
 
 
 async def get_sudoers() -> list:
@@ -616,53 +780,83 @@ async def get_sudoers() -> list:
 
 
 async def add_sudo(user_id: int) -> bool:
-    sudoers = await get_sudoers()
-    sudoers.append(user_id)
     await sudoersdb.update_one(
-        {"sudo": "sudo"}, {"$set": {"sudoers": sudoers}}, upsert=True
+        {"sudo": "sudo"}, {"$addToSet": {"sudoers": user_id}}, upsert=True
     )
+    SUDOERS.add(user_id)
+    await bus.publish("sudo", user_id)
     return True
 
 
 async def remove_sudo(user_id: int) -> bool:
-    sudoers = await get_sudoers()
-    sudoers.remove(user_id)
-    await sudoersdb.update_one(
-        {"sudo": "sudo"}, {"$set": {"sudoers": sudoers}}, upsert=True
-    )
+    await sudoersdb.update_one({"sudo": "sudo"}, {"$pull": {"sudoers": user_id}})
+    SUDOERS.discard(user_id)
+    await bus.publish("sudo", user_id)
     return True
 
 
 async def get_banned_users() -> list:
-    results = []
-    async for user in blockeddb.find({"user_id": {"$gt": 0}}):
-        user_id = user["user_id"]
-        results.append(user_id)
-    return results
+    return [user_id async for user_id in iter_banned_users()]
 
 
 async def get_banned_count() -> int:
-    users = blockeddb.find({"user_id": {"$gt": 0}})
-    users = await users.to_list(length=100000)
-    return len(users)
+    return await blockeddb.count_documents({"user_id": {"$gt": 0}})
 
 
 async def is_banned_user(user_id: int) -> bool:
-    user = await blockeddb.find_one({"user_id": user_id})
-    if not user:
-        return False
-    return True
+    return user_id in banned
 
 
 async def add_banned_user(user_id: int):
-    is_gbanned = await is_banned_user(user_id)
-    if is_gbanned:
-        return
-    return await blockeddb.insert_one({"user_id": user_id})
+    banned.add(user_id)
+    _sync_banned(user_id)
+    return await _insert_id(blockeddb, "user_id", user_id)
 
 
 async def remove_banned_user(user_id: int):
-    is_gbanned = await is_banned_user(user_id)
-    if not is_gbanned:
-        return
-    return await blockeddb.delete_one({"user_id": user_id})
+    banned.discard(user_id)
+    _sync_banned(user_id)
+    return await _delete_id(blockeddb, "user_id", user_id)
+
+
+# Changes made by other instances sharing the database.
+
+
+async def _drop_chat_settings(chat_id: int):
+    chatsettings.invalidate(chat_id)
+    assistantdict.pop(chat_id, None)
+
+
+async def _drop_authusers(chat_id: int):
+    authusers.invalidate(chat_id)
+
+
+async def _reload_id(collection, key: str, ids: set, value: int):
+    if await collection.find_one({key: value}, {"_id": 1}):
+        ids.add(value)
+    else:
+        ids.discard(value)
+
+
+async def _reload_ban(collection, ids: set, user_id: int):
+    await _reload_id(collection, "user_id", ids, user_id)
+    _sync_banned(user_id)
+
+
+async def _reload_sudo(user_id: int):
+    if user_id == config.OWNER_ID or user_id in await get_sudoers():
+        SUDOERS.add(user_id)
+    else:
+        SUDOERS.discard(user_id)
+
+
+bus.register("settings", _drop_chat_settings)
+bus.register("authusers", _drop_authusers)
+bus.register("flag", _read_flag)
+bus.register(gbansdb.name, lambda user_id: _reload_ban(gbansdb, gbanned, user_id))
+bus.register(blockeddb.name, lambda user_id: _reload_ban(blockeddb, banned, user_id))
+bus.register(
+    blacklist_chatdb.name,
+    lambda chat_id: _reload_id(blacklist_chatdb, "chat_id", blacklist, chat_id),
+)
+bus.register("sudo", _reload_sudo)
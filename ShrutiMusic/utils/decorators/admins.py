@@ -2,22 +2,20 @@ from pyrogram.enums import ChatType
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from ShrutiMusic import app
+from ShrutiMusic.core.session import sessions
 from ShrutiMusic.misc import SUDOERS, db
 from ShrutiMusic.utils.database import (
-    get_authuser_names,
-    get_cmode,
+    CHAT_SETTINGS,
+    get_chat_settings,
     get_lang,
     get_upvote_count,
     is_active_chat,
+    is_authuser,
     is_maintenance,
-    is_nonadmin_chat,
-    is_skipmode,
 )
-from config import SUPPORT_GROUP, adminlist, confirmer
+from config import SUPPORT_GROUP, adminlist
 from strings import get_string
 
-from ..formatters import int_to_alpha
-
 
 def AdminRightsCheck(mystic):
     async def wrapper(client, message):
@@ -34,9 +32,10 @@ def AdminRightsCheck(mystic):
             pass
 
         try:
-            language = await get_lang(message.chat.id)
-            _ = get_string(language)
+            settings = await get_chat_settings(message.chat.id)
+            _ = get_string(settings["lang"])
         except:
+            settings = CHAT_SETTINGS
             _ = get_string("en")
         if message.sender_chat:
             upl = InlineKeyboardMarkup(
@@ -51,7 +50,7 @@ def AdminRightsCheck(mystic):
             )
             return await message.reply_text(_["general_3"], reply_markup=upl)
         if message.command[0][0] == "c":
-            chat_id = await get_cmode(message.chat.id)
+            chat_id = settings["cmode"]
             if chat_id is None:
                 return await message.reply_text(_["setting_7"])
             try:
@@ -62,15 +61,14 @@ def AdminRightsCheck(mystic):
             chat_id = message.chat.id
         if not await is_active_chat(chat_id):
             return await message.reply_text(_["general_5"])
-        is_non_admin = await is_nonadmin_chat(message.chat.id)
-        if not is_non_admin:
+        if not settings["nonadmin"]:
             if message.from_user.id not in SUDOERS:
                 admins = adminlist.get(message.chat.id)
                 if not admins:
                     return await message.reply_text(_["admin_13"])
                 else:
                     if message.from_user.id not in admins:
-                        if await is_skipmode(message.chat.id):
+                        if settings["skipmode"]:
                             upvote = await get_upvote_count(chat_id)
                             text = f"""<b>ᴀᴅᴍɪɴ ʀɪɢʜᴛs ɴᴇᴇᴅᴇᴅ</b>
 
@@ -94,15 +92,13 @@ def AdminRightsCheck(mystic):
                                     ]
                                 ]
                             )
-                            if chat_id not in confirmer:
-                                confirmer[chat_id] = {}
                             try:
                                 vidid = db[chat_id][0]["vidid"]
                                 file = db[chat_id][0]["file"]
                             except:
                                 return await message.reply_text(_["admin_14"])
                             senn = await message.reply_text(text, reply_markup=upl)
-                            confirmer[chat_id][senn.id] = {
+                            sessions.open(chat_id).confirmer[senn.id] = {
                                 "vidid": vidid,
                                 "file": file,
                             }
@@ -169,14 +165,14 @@ def ActualAdminCB(mystic):
                     show_alert=True,
                 )
         try:
-            language = await get_lang(CallbackQuery.message.chat.id)
-            _ = get_string(language)
+            settings = await get_chat_settings(CallbackQuery.message.chat.id)
+            _ = get_string(settings["lang"])
         except:
+            settings = CHAT_SETTINGS
             _ = get_string("en")
         if CallbackQuery.message.chat.type == ChatType.PRIVATE:
             return await mystic(client, CallbackQuery, _)
-        is_non_admin = await is_nonadmin_chat(CallbackQuery.message.chat.id)
-        if not is_non_admin:
+        if not settings["nonadmin"]:
             try:
                 a = (
                     await app.get_chat_member(
@@ -188,9 +184,9 @@ def ActualAdminCB(mystic):
                 return await CallbackQuery.answer(_["general_4"], show_alert=True)
             if not a.can_manage_video_chats:
                 if CallbackQuery.from_user.id not in SUDOERS:
-                    token = await int_to_alpha(CallbackQuery.from_user.id)
-                    _check = await get_authuser_names(CallbackQuery.from_user.id)
-                    if token not in _check:
+                    if not await is_authuser(
+                        CallbackQuery.message.chat.id, CallbackQuery.from_user.id
+                    ):
                         try:
                             return await CallbackQuery.answer(
                                 _["general_4"],
@@ -13,10 +13,7 @@ from ShrutiMusic import YouTube, app
 from ShrutiMusic.misc import SUDOERS
 from ShrutiMusic.utils.database import (
     get_assistant,
-    get_cmode,
-    get_lang,
-    get_playmode,
-    get_playtype,
+    get_chat_settings,
     is_active_chat,
     is_maintenance,
 )
@@ -29,8 +26,8 @@ links = {}
 
 def PlayWrapper(command):
     async def wrapper(client, message):
-        language = await get_lang(message.chat.id)
-        _ = get_string(language)
+        settings = await get_chat_settings(message.chat.id)
+        _ = get_string(settings["lang"])
         if message.sender_chat:
             upl = InlineKeyboardMarkup(
                 [
@@ -79,7 +76,7 @@ def PlayWrapper(command):
                     reply_markup=InlineKeyboardMarkup(buttons),
                 )
         if message.command[0][0] == "c":
-            chat_id = await get_cmode(message.chat.id)
+            chat_id = settings["cmode"]
             if chat_id is None:
                 return await message.reply_text(_["setting_7"])
             try:
@@ -90,9 +87,8 @@ def PlayWrapper(command):
         else:
             chat_id = message.chat.id
             channel = None
-        playmode = await get_playmode(message.chat.id)
-        playty = await get_playtype(message.chat.id)
-        if playty != "Everyone":
+        playmode = settings["playmode"]
+        if settings["playtype"] != "Everyone":
             if message.from_user.id not in SUDOERS:
                 admins = adminlist.get(message.chat.id)
                 if not admins:
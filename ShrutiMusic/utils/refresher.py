@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from pyrogram.errors import FloodWait, MessageNotModified
+from pyrogram.types import InlineKeyboardMarkup
+
+import config
+from ShrutiMusic.core.queue import MessageRef
+from ShrutiMusic.core.session import sessions
+from ShrutiMusic.logging import LOGGER
+from ShrutiMusic.utils.database import get_lang
+from ShrutiMusic.utils.formatters import seconds_to_min
+from ShrutiMusic.utils.inline import stream_markup_timer
+from strings import get_string
+
+# Seconds between two passes over the tracked messages.
+TICK = 1
+# Minimum seconds between two edits of the same message.
+INTERVAL = 6
+
+
+class Panel:
+    __slots__ = ("chat_id", "track", "render", "text", "due")
+
+    def __init__(self, chat_id: int, track, render):
+        self.chat_id = chat_id
+        self.track = track
+        self.render = render
+        self.text = None
+        self.due = 0
+
+
+panels = {}
+backoff = {}
+# Messages that can no longer be edited, skipped until their track ends.
+dead = set()
+
+
+def watch(message, chat_id: int, render):
+    session = sessions.get(chat_id)
+    if not session or not session.queue:
+        return
+    ref = MessageRef.of(message)
+    dead.discard(ref)
+    panels[ref] = Panel(chat_id, session.queue[0], render)
+
+
+def unwatch(message):
+    panels.pop(MessageRef.of(message), None)
+
+
+def _player_markup(_, chat_id):
+    def render(track):
+        return InlineKeyboardMarkup(
+            stream_markup_timer(
+                _, chat_id, seconds_to_min(track["played"]), track["dur"]
+            )
+        )
+
+    return render
+
+
+async def _discover():
+    current = set()
+    for session in sessions.values():
+        if not session.active or not session.queue:
+            continue
+        track = session.queue[0]
+        ref = track["mystic"]
+        current.add(ref)
+        if not ref or ref in panels or ref in dead or not track["seconds"]:
+            continue
+        try:
+            _ = get_string(await get_lang(session.chat_id))
+        except:
+            _ = get_string("en")
+        panels[ref] = Panel(session.chat_id, track, _player_markup(_, session.chat_id))
+    dead.intersection_update(current)
+
+
+def _alive(panel) -> bool:
+    session = sessions.get(panel.chat_id)
+    return bool(
+        session and session.active and session.queue and session.queue[0] is panel.track
+    )
+
+
+async def _edit(ref, panel, text):
+    try:
+        await ref.edit_reply_markup(panel.render(panel.track))
+        panel.text = text
+    except FloodWait as e:
+        backoff[ref.chat_id] = time.monotonic() + e.value
+        LOGGER(__name__).info(f"Player refresh in {ref.chat_id} paused for {e.value}s")
+    except MessageNotModified:
+        panel.text = text
+    except Exception:
+        panels.pop(ref, None)
+        dead.add(ref)
+
+
+async def refresher():
+    while not await asyncio.sleep(TICK):
+        try:
+            await _discover()
+            now = time.monotonic()
+            for chat_id in [x for x, until in backoff.items() if until <= now]:
+                del backoff[chat_id]
+            for ref, panel in sorted(panels.items(), key=lambda x: x[1].due):
+                if panel.due > now:
+                    break
+                if not _alive(panel):
+                    panels.pop(ref, None)
+                    continue
+                if ref.chat_id in backoff:
+                    continue
+                session = sessions.get(panel.chat_id)
+                if not session.playing:
+                    continue
+                text = seconds_to_min(panel.track["played"])
+                if text == panel.text:
+                    continue
+                panel.due = now + INTERVAL
+                await _edit(ref, panel, text)
+                # Spread the edits of one pass under the global budget.
+                await asyncio.sleep(1 / config.UI_EDIT_RATE)
+        except Exception as e:
+            LOGGER(__name__).warning(f"Player refresh failed: {e}")
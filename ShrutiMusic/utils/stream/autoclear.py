@@ -1,18 +1,83 @@
+import asyncio
 import os
+import time
 
-from config import autoclean
+import config
+from ShrutiMusic.logging import LOGGER
+
+# Queue entries whose file is not a local path.
+PSEUDO = ("vid_", "live_", "index_")
+# Seconds between two deletion batches.
+SWEEP_INTERVAL = 30
+
+refs = {}
+released = {}
+_sweeper = None
+
+
+def _is_local(path) -> bool:
+    return bool(path) and not str(path).startswith(PSEUDO) and "://" not in str(path)
+
+
+def acquire(path):
+    if not _is_local(path):
+        return
+    refs[path] = refs.get(path, 0) + 1
+    released.pop(path, None)
+
+
+def release(path):
+    count = refs.get(path)
+    if not count:
+        return
+    if count > 1:
+        refs[path] = count - 1
+        return
+    del refs[path]
+    released[path] = time.monotonic()
+    _schedule()
+
+
+def _schedule():
+    global _sweeper
+    if _sweeper is None or _sweeper.done():
+        _sweeper = asyncio.create_task(_sweep())
+
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            LOGGER(__name__).warning(f"Failed to remove {path}: {e}")
+
+
+async def _sweep():
+    while released:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        now = time.monotonic()
+        batch = [
+            path
+            for path, since in released.items()
+            if now - since >= config.MEDIA_CACHE_TTL
+        ]
+        for path in batch:
+            del released[path]
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(None, _remove, batch)
+
+
+def release_track(track):
+    release(track["file"])
+    resolved = track.get("resolved")
+    if resolved and resolved != track["file"]:
+        release(resolved)
 
 
 async def auto_clean(popped):
     try:
-        rem = popped["file"]
-        autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+        release_track(popped)
     except:
         pass
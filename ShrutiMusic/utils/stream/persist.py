@@ -0,0 +1,177 @@
+import asyncio
+import os
+import time
+
+from pymongo import DeleteOne, UpdateOne
+
+import config
+from ShrutiMusic import YouTube
+from ShrutiMusic.core.call import Aviax
+from ShrutiMusic.core.handoff import handoff
+from ShrutiMusic.core.mongo import mongodb
+from ShrutiMusic.core.queue import Track, TrackQueue
+from ShrutiMusic.core.session import sessions
+from ShrutiMusic.logging import LOGGER
+from ShrutiMusic.utils.stream.autoclear import acquire, auto_clean
+from ShrutiMusic.utils.stream.source import remember_source, resolve_source
+
+queuedb = mongodb.queues
+
+_written = {}
+_frozen = False
+
+
+def _snapshot(queue) -> list:
+    tracks = []
+    for track in queue:
+        track = track.to_dict()
+        track.pop("played", None)
+        tracks.append(track)
+    return tracks
+
+
+async def flush():
+    ops = []
+    pending = {}
+    seen = set()
+    now = time.time()
+    for session in sessions.values():
+        if not session.active or not session.queue:
+            continue
+        chat_id = session.chat_id
+        seen.add(chat_id)
+        fields = {
+            "played": session.queue[0]["played"],
+            "video": session.video,
+            "loop": session.loop,
+            "updated": now,
+        }
+        snapshot = _snapshot(session.queue)
+        if _written.get(chat_id) != snapshot:
+            fields["queue"] = snapshot
+            pending[chat_id] = snapshot
+        ops.append(UpdateOne({"_id": chat_id}, {"$set": fields}, upsert=True))
+    gone = [chat_id for chat_id in _written if chat_id not in seen]
+    ops.extend(DeleteOne({"_id": chat_id}) for chat_id in gone)
+    if not ops:
+        return
+    await queuedb.bulk_write(ops, ordered=False)
+    _written.update(pending)
+    for chat_id in gone:
+        del _written[chat_id]
+
+
+async def freeze():
+    global _frozen
+    await flush()
+    _frozen = True
+
+
+def thaw():
+    global _frozen
+    _frozen = False
+
+
+async def writer():
+    while not await asyncio.sleep(config.QUEUE_PERSIST_INTERVAL):
+        if _frozen:
+            continue
+        try:
+            await flush()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to persist queues: {e}")
+
+
+async def _source(chat_id: int, track):
+    queued = track["file"]
+    vidid = track["vidid"]
+    youtube = vidid not in ("telegram", "soundcloud") and "index_" not in queued
+    resolved = track["resolved"]
+    if resolved and "://" not in resolved and not os.path.isfile(resolved):
+        track["resolved"] = None
+    if "live_" in queued or (
+        not queued.startswith(("vid_", "index_")) and not os.path.isfile(queued)
+    ):
+        if not youtube:
+            return None
+        n, link = await YouTube.video(vidid, True)
+        if n == 0:
+            return None
+        remember_source(track, link)
+        return link
+    return await resolve_source(chat_id)
+
+
+async def _rejoin(doc: dict, clock: bool, calls, collection, now) -> bool:
+    chat_id = doc["_id"]
+    queue = TrackQueue(Track(**track) for track in doc.get("queue") or [])
+    if not queue:
+        await collection.delete_one({"_id": chat_id})
+        return False
+    track = queue[0]
+    if track["old_dur"]:
+        track["dur"] = track["old_dur"]
+        track["seconds"] = track["old_second"]
+        track["speed_path"] = None
+        track["speed"] = 1.0
+    played = doc.get("played") or 0
+    if clock:
+        played += int(now() - doc.get("updated", now()))
+    track["played"] = min(played, max(track["seconds"] or 0, 0))
+    session = sessions.open(chat_id)
+    session.queue = queue
+    session.loop = doc.get("loop") or 0
+    for queued in queue:
+        acquire(queued["file"])
+        if queued["resolved"] and queued["resolved"] != queued["file"]:
+            acquire(queued["resolved"])
+    try:
+        source = await _source(chat_id, track)
+        if not source:
+            raise ValueError("source is gone")
+        await calls.rejoin_stream(
+            chat_id, source, track["played"], track["dur"], doc.get("video")
+        )
+    except Exception as e:
+        LOGGER(__name__).warning(f"Could not resume the queue of {chat_id}: {e}")
+        for queued in queue:
+            await auto_clean(queued)
+        sessions.close(chat_id)
+        await collection.delete_one({"_id": chat_id})
+        return False
+    _written[chat_id] = _snapshot(queue)
+    return True
+
+
+async def restore(clock: bool = False, calls=None, collection=None, now=time.time):
+    """Rejoin every saved call. With ``clock`` the offsets are advanced by
+    the time spent since the last save, as the old process kept playing."""
+    calls = calls or Aviax
+    collection = collection or queuedb
+    docs = [doc async for doc in collection.find({})]
+    if not docs:
+        return 0
+    limit = asyncio.Semaphore(config.REJOIN_CONCURRENCY)
+
+    async def rejoin(doc):
+        async with limit:
+            try:
+                return await _rejoin(doc, clock, calls, collection, now)
+            except Exception as e:
+                LOGGER(__name__).warning(f"Could not resume {doc.get('_id')}: {e}")
+                return False
+
+    resumed = sum(await asyncio.gather(*(rejoin(doc) for doc in docs)))
+    LOGGER(__name__).info(f"Resumed {resumed} of {len(docs)} saved queues.")
+    return resumed
+
+
+async def start():
+    try:
+        marker = await handoff.pending(config.HANDOFF_TIMEOUT)
+        resumed = await restore(clock=bool(marker))
+        if marker:
+            await handoff.complete(resumed)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Failed to restore queues: {e}")
+    await writer()
@@ -0,0 +1,58 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+from ShrutiMusic import YouTube
+from ShrutiMusic.misc import db
+from ShrutiMusic.utils.stream.autoclear import acquire
+
+# Stream URLs are dropped this many seconds before they actually expire,
+# leaving time for ffmpeg to open them.
+EXPIRY_MARGIN = 60
+
+
+def _expiry(source: str):
+    if not source.startswith("http"):
+        return None
+    query = parse_qs(urlparse(source).query)
+    try:
+        return int(query["expire"][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+def cached_source(track: dict):
+    source = track.get("resolved")
+    if not source:
+        return None
+    expires = track.get("expires")
+    if expires and expires - EXPIRY_MARGIN <= time.time():
+        track["resolved"] = None
+        return None
+    return source
+
+
+def remember_source(track: dict, source: str):
+    if source != track["file"] and source != track.get("resolved"):
+        acquire(source)
+    track["resolved"] = source
+    track["expires"] = _expiry(source)
+
+
+async def resolve_source(chat_id: int):
+    playing = db.get(chat_id)
+    if not playing:
+        return None
+    track = playing[0]
+    queued = track["file"]
+    if "index_" in queued:
+        return track["vidid"]
+    if "vid_" not in queued:
+        return queued
+    source = cached_source(track)
+    if source:
+        return source
+    n, source = await YouTube.video(track["vidid"], True)
+    if n == 0:
+        return None
+    remember_source(track, source)
+    return source
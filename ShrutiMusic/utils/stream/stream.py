@@ -13,6 +13,7 @@ from ShrutiMusic.utils.exceptions import AssistantErr
 from ShrutiMusic.utils.inline import aq_markup, close_markup, stream_markup
 from ShrutiMusic.utils.pastebin import AviaxBin
 from ShrutiMusic.utils.stream.queue import put_queue, put_queue_index
+from ShrutiMusic.utils.stream.source import remember_source
 from ShrutiMusic.utils.thumbnails import gen_thumb
 
 
@@ -113,6 +114,7 @@ async def stream(
                 )
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "stream"
+                remember_source(db[chat_id][0], file_path)
         if count == 0:
             return
         else:
@@ -207,6 +209,7 @@ async def stream(
             )
             db[chat_id][0]["mystic"] = run
             db[chat_id][0]["markup"] = "stream"
+            remember_source(db[chat_id][0], file_path)
     elif streamtype == "soundcloud":
         file_path = result["filepath"]
         title = result["title"]
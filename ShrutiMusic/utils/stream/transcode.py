@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+
+from pytgcalls.types.input_stream import AudioPiped, InputAudioStream, InputStream
+from pytgcalls.types.input_stream.quality import HighQualityAudio
+
+import config
+from ShrutiMusic.logging import LOGGER
+
+# PyTgCalls pipes every AudioPiped source through ffmpeg as mono s16le at
+# the bitrate of the audio parameters, so this is what we store on disk.
+RAW_INPUT = "-f s16le -ac 1 -ar 48000"
+TRANSCODE_DIR = os.path.join(os.getcwd(), "transcoded")
+
+plays = {}
+cached = OrderedDict()
+pending = set()
+_lock = asyncio.Semaphore(1)
+
+
+def _key(path) -> str:
+    return hashlib.md5(os.path.abspath(str(path)).encode()).hexdigest()
+
+
+def _load():
+    if not os.path.isdir(TRANSCODE_DIR):
+        return
+    files = []
+    for name in os.listdir(TRANSCODE_DIR):
+        if not name.endswith(".raw"):
+            continue
+        out = os.path.join(TRANSCODE_DIR, name)
+        files.append((os.path.getmtime(out), name[:-4], out))
+    for _, key, out in sorted(files):
+        cached[key] = (out, os.path.getsize(out))
+
+
+def cache_size() -> int:
+    return sum(size for _, size in cached.values())
+
+
+def _evict():
+    limit = config.TRANSCODE_CACHE_LIMIT * 1024 * 1024
+    total = cache_size()
+    while cached and total > limit:
+        key, (out, size) = cached.popitem(last=False)
+        total -= size
+        try:
+            os.remove(out)
+        except:
+            pass
+
+
+def get_transcoded(path):
+    key = _key(path)
+    entry = cached.get(key)
+    if not entry:
+        return None
+    if not os.path.isfile(entry[0]):
+        cached.pop(key, None)
+        return None
+    cached.move_to_end(key)
+    return entry[0]
+
+
+async def _transcode(path, key):
+    out = os.path.join(TRANSCODE_DIR, f"{key}.raw")
+    part = f"{out}.part"
+    try:
+        async with _lock:
+            os.makedirs(TRANSCODE_DIR, exist_ok=True)
+            proc = await asyncio.create_subprocess_exec(
+                "nice",
+                "-n",
+                "10",
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-i",
+                path,
+                *RAW_INPUT.split(),
+                part,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                LOGGER(__name__).warning(
+                    f"Transcode failed for {key}: {stderr.decode().strip()[:200]}"
+                )
+                return
+            os.replace(part, out)
+            cached[key] = (out, os.path.getsize(out))
+            _evict()
+    except Exception as e:
+        LOGGER(__name__).warning(f"Transcode failed for {key}: {e}")
+    finally:
+        pending.discard(key)
+        if os.path.exists(part):
+            try:
+                os.remove(part)
+            except:
+                pass
+
+
+def register_play(path):
+    if not config.TRANSCODE_THRESHOLD or not path or not os.path.isfile(str(path)):
+        return
+    key = _key(path)
+    plays[key] = plays.get(key, 0) + 1
+    if key in cached or key in pending:
+        return
+    if plays[key] >= config.TRANSCODE_THRESHOLD:
+        pending.add(key)
+        asyncio.create_task(_transcode(str(path), key))
+
+
+def audio_stream(path, additional_ffmpeg_parameters: str = ""):
+    raw = get_transcoded(path)
+    if raw and not additional_ffmpeg_parameters:
+        return InputStream(InputAudioStream(raw, HighQualityAudio()))
+    if raw:
+        return AudioPiped(
+            raw,
+            audio_parameters=HighQualityAudio(),
+            additional_ffmpeg_parameters=f"{RAW_INPUT} {additional_ffmpeg_parameters}",
+        )
+    return AudioPiped(
+        path,
+        audio_parameters=HighQualityAudio(),
+        additional_ffmpeg_parameters=additional_ffmpeg_parameters,
+    )
+
+
+_load()
@@ -0,0 +1,161 @@
+"""Per-thumbnail render time of the compositing, before and after canvas.py.
+
+Run from the repository root:
+
+    python benchmarks/thumbnails.py [renders]
+
+"before" is the pipeline thumbnails.py used until the compositing moved to
+ShrutiMusic/utils/canvas.py, kept here as the baseline. Only Pillow and numpy
+are needed: canvas.py is loaded by path, so the bot package is not imported.
+Both cards are saved next to each other in cache/ to compare them by eye.
+"""
+
+import importlib.util
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+spec = importlib.util.spec_from_file_location("canvas", "ShrutiMusic/utils/canvas.py")
+canvas = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(canvas)
+
+TITLE = "Some Very Long Song Title Official Music Video With Lyrics"
+CHANNEL = "Some Channel"
+VIEWS = "12M views"
+DURATION = "3:45"
+
+
+def before(source):
+    def changeImageSize(maxWidth, maxHeight, image):
+        widthRatio = maxWidth / image.size[0]
+        heightRatio = maxHeight / image.size[1]
+        newWidth = int(widthRatio * image.size[0])
+        newHeight = int(heightRatio * image.size[1])
+        return image.resize((newWidth, newHeight))
+
+    def generate_gradient(width, height, start_color, end_color):
+        base = Image.new("RGBA", (width, height), start_color)
+        top = Image.new("RGBA", (width, height), end_color)
+        mask = Image.new("L", (width, height))
+        mask_data = []
+        for y in range(height):
+            mask_data.extend([int(60 * (y / height))] * width)
+        mask.putdata(mask_data)
+        base.paste(top, (0, 0), mask)
+        return base
+
+    def crop_center_circle(img, output_size, border, border_color, crop_scale=1.5):
+        half_the_width = img.size[0] / 2
+        half_the_height = img.size[1] / 2
+        larger_size = int(output_size * crop_scale)
+        img = img.crop(
+            (
+                half_the_width - larger_size / 2,
+                half_the_height - larger_size / 2,
+                half_the_width + larger_size / 2,
+                half_the_height + larger_size / 2,
+            )
+        )
+        img = img.resize((output_size - 2 * border, output_size - 2 * border))
+        final_img = Image.new("RGBA", (output_size, output_size), border_color)
+        mask_main = Image.new("L", (output_size - 2 * border, output_size - 2 * border), 0)
+        draw_main = ImageDraw.Draw(mask_main)
+        draw_main.ellipse(
+            (0, 0, output_size - 2 * border, output_size - 2 * border), fill=255
+        )
+        final_img.paste(img, (border, border), mask_main)
+        mask_border = Image.new("L", (output_size, output_size), 0)
+        draw_border = ImageDraw.Draw(mask_border)
+        draw_border.ellipse((0, 0, output_size, output_size), fill=255)
+        return Image.composite(
+            final_img, Image.new("RGBA", final_img.size, (0, 0, 0, 0)), mask_border
+        )
+
+    def draw_text_with_shadow(
+        background, draw, position, text, font, fill, shadow_offset=(3, 3), shadow_blur=5
+    ):
+        shadow = Image.new("RGBA", background.size, (0, 0, 0, 0))
+        shadow_draw = ImageDraw.Draw(shadow)
+        shadow_draw.text(position, text, font=font, fill="black")
+        shadow = shadow.filter(ImageFilter.GaussianBlur(radius=shadow_blur))
+        background.paste(shadow, shadow_offset, shadow)
+        draw.text(position, text, font=font, fill=fill)
+
+    image1 = changeImageSize(1280, 720, source)
+    image2 = image1.convert("RGBA")
+    background = image2.filter(filter=ImageFilter.BoxBlur(20))
+    background = ImageEnhance.Brightness(background).enhance(0.6)
+    start_gradient_color = canvas.random_color()
+    end_gradient_color = canvas.random_color()
+    gradient_image = generate_gradient(1280, 720, start_gradient_color, end_gradient_color)
+    background = Image.blend(background, gradient_image, alpha=0.2)
+
+    draw = ImageDraw.Draw(background)
+    arial = ImageFont.truetype("ShrutiMusic/assets/font2.ttf", 30)
+    ImageFont.truetype("ShrutiMusic/assets/font.ttf", 30)
+    title_font = ImageFont.truetype("ShrutiMusic/assets/font3.ttf", 45)
+
+    circle_thumbnail = crop_center_circle(source, 400, 20, start_gradient_color)
+    circle_thumbnail = circle_thumbnail.resize((400, 400))
+    background.paste(circle_thumbnail, (120, 160), circle_thumbnail)
+
+    x = 565
+    title1 = canvas.truncate(TITLE)
+    white = (255, 255, 255)
+    draw_text_with_shadow(background, draw, (x, 180), title1[0], title_font, white)
+    draw_text_with_shadow(background, draw, (x, 230), title1[1], title_font, white)
+    draw_text_with_shadow(
+        background, draw, (x, 320), f"{CHANNEL}  |  {VIEWS[:23]}", arial, white
+    )
+    line_color = canvas.random_color()
+    played = int(580 * random.uniform(0.15, 0.85))
+    draw.line([(x, 380), (x + played, 380)], fill=line_color, width=9)
+    draw.line([(x + played, 380), (x + 580, 380)], fill="white", width=8)
+    draw.ellipse([x + played - 10, 370, x + played + 10, 390], fill=line_color)
+    draw_text_with_shadow(background, draw, (x, 400), "00:00", arial, white)
+    draw_text_with_shadow(background, draw, (1080, 400), DURATION, arial, white)
+
+    play_icons = Image.open("ShrutiMusic/assets/play_icons.png").resize((580, 62))
+    background.paste(play_icons, (x, 450), play_icons)
+    return background
+
+
+def after(source):
+    return canvas.compose(source, TITLE, DURATION, VIEWS, CHANNEL)
+
+
+def bench(render, source, renders: int) -> list:
+    render(source)
+    times = []
+    for _ in range(renders):
+        started = time.perf_counter()
+        render(source)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main():
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    # Same size as the hqdefault covers fetched from YouTube.
+    rng = np.random.default_rng(0)
+    source = Image.fromarray(rng.integers(0, 256, (360, 480, 3), np.uint8), "RGB")
+    os.makedirs("cache", exist_ok=True)
+    results = {}
+    for name, render in (("before", before), ("after", after)):
+        times = bench(render, source, renders)
+        results[name] = statistics.median(times)
+        print(
+            f"{name:>6}: median {results[name]:.1f} ms, "
+            f"min {min(times):.1f} ms over {renders} renders"
+        )
+        render(source).convert("RGB").save(f"cache/bench_{name}.png")
+    print(f"speedup: {results['before'] / results['after']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,10 @@ OWNER_USERNAME = os.getenv("OWNER_USERNAME", "WTF_WhyMeeh")
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 MONGO_DB_URI = os.getenv("MONGO_DB_URI", None)
+# Storage backend: "mongo" (MONGO_DB_URI) or "sqlite" (a local file, no server needed).
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "mongo").lower()
+# Database file of the sqlite backend.
+SQLITE_PATH = os.getenv("SQLITE_PATH", "ShrutiMusic.sqlite3")
 LOG_GROUP_ID = int(os.getenv("LOG_GROUP_ID", None))
 HEROKU_APP_NAME = os.getenv("HEROKU_APP_NAME")
 HEROKU_API_KEY = os.getenv("HEROKU_API_KEY")
@@ -80,6 +84,58 @@ STRING5 = os.getenv("STRING_SESSION5", None)
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 AUTO_LEAVING_ASSISTANT = bool(os.getenv("AUTO_LEAVING_ASSISTANT", False))
+# Player progress edits per second across all chats
+UI_EDIT_RATE = int(os.getenv("UI_EDIT_RATE", 10))
+# Seconds between two batched saves of the queues (restored after a restart)
+QUEUE_PERSIST_INTERVAL = int(os.getenv("QUEUE_PERSIST_INTERVAL", 5))
+# Calls rejoined in parallel while restoring the queues on startup
+REJOIN_CONCURRENCY = int(os.getenv("REJOIN_CONCURRENCY", 4))
+# Seconds /handoff waits for the new process to take over the calls
+HANDOFF_TIMEOUT = int(os.getenv("HANDOFF_TIMEOUT", 120))
+# Chats whose settings are kept in memory, per setting
+SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", 10000))
+# Seconds a cached chat setting is trusted before it is read again
+SETTINGS_CACHE_TTL = int(os.getenv("SETTINGS_CACHE_TTL", 900))
+# Seconds between two batched saves of newly seen users and chats
+SERVED_FLUSH_INTERVAL = int(os.getenv("SERVED_FLUSH_INTERVAL", 10))
+# Ids remembered as already saved, per users and chats (about 100 bytes each);
+# a forgotten id only costs one more upsert when it is seen again
+SERVED_CACHE_SIZE = int(os.getenv("SERVED_CACHE_SIZE", 100000))
+# Seconds between two reloads of the global switches (maintenance, logging, autoend...)
+FLAGS_REFRESH_INTERVAL = int(os.getenv("FLAGS_REFRESH_INTERVAL", 60))
+# Database calls slower than this are logged (in ms, 0 disables)
+DB_SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", 250))
+# Cache invalidation across instances sharing the database: "auto" (change
+# streams on a replica set, polling otherwise), "poll" or "off" for a single
+# instance, as every cached write then costs two more round-trips
+CACHE_BUS = os.getenv("CACHE_BUS", "off").lower()
+# Seconds between two polls for cache invalidations from other instances
+CACHE_BUS_INTERVAL = int(os.getenv("CACHE_BUS_INTERVAL", 2))
+# Threads rendering the thumbnails off the event loop
+THUMB_WORKERS = int(os.getenv("THUMB_WORKERS", 2))
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 🎚️ Media Cache Settings
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+# Plays of the same file before it is pre-transcoded to raw PCM (0 disables)
+TRANSCODE_THRESHOLD = int(os.getenv("TRANSCODE_THRESHOLD", 3))
+# Disk budget of the transcode cache (in MB)
+TRANSCODE_CACHE_LIMIT = int(os.getenv("TRANSCODE_CACHE_LIMIT", 2048))
+# Seconds a download no chat references anymore is kept for replays before deletion
+MEDIA_CACHE_TTL = int(os.getenv("MEDIA_CACHE_TTL", 300))
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 🚦 Admission Control Settings
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+# Thresholds as "queue,downgrade,refuse" : new joins are queued, then new video
+# streams are downgraded, then new joins are refused (empty disables a metric)
+ADMISSION_CPU = os.getenv("ADMISSION_CPU", "75,85,95")
+ADMISSION_MEMORY = os.getenv("ADMISSION_MEMORY", "80,88,95")
+ADMISSION_LAG = os.getenv("ADMISSION_LAG", "100,250,500")
+# Seconds a queued join waits for the load to drop before it is refused
+ADMISSION_WAIT = int(os.getenv("ADMISSION_WAIT", 120))
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 🖼️ Image URLs (Can be customized)
@@ -105,9 +161,6 @@ SPOTIFY_PLAYLIST_IMG_URL = "https://files.catbox.moe/eehxb4.jpg"
 BANNED_USERS = filters.user()
 adminlist = {}
 lyrical = {}
-votemode = {}
-autoclean = []
-confirmer = {}
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # ⏳ Time Conversion Utility
@@ -0,0 +1,189 @@
+import asyncio
+
+from ShrutiMusic.core.handoff import MARKER, Handoff
+from ShrutiMusic.core.session import sessions
+from ShrutiMusic.utils.stream import persist
+from ShrutiMusic.utils.stream.autoclear import refs
+
+TIMEOUT = 60
+
+
+class FakeCollection:
+    """The few Motor collection calls the handoff and the restore make."""
+
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+
+    def _matching(self, query):
+        for doc in list(self.docs.values()):
+            if all(doc.get(key) == value for key, value in query.items()):
+                yield doc
+
+    async def find_one(self, query):
+        for doc in self._matching(query):
+            return dict(doc)
+        return None
+
+    async def _find(self, query):
+        for doc in self._matching(query):
+            yield dict(doc)
+
+    def find(self, query):
+        return self._find(query)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next(self._matching(query), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = self.docs[query["_id"]] = {"_id": query["_id"]}
+        doc.update(update["$set"])
+
+    async def delete_one(self, query):
+        for doc in self._matching(query):
+            del self.docs[doc["_id"]]
+            return
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class FakeCalls:
+    """Stands in for PyTgCalls, recording where each call was rejoined."""
+
+    def __init__(self):
+        self.joined = {}
+
+    async def rejoin_stream(self, chat_id, source, played, duration, video):
+        self.joined[chat_id] = (source, played, video)
+
+
+def saved_queue(chat_id: int, path: str, played: int, updated: float) -> dict:
+    track = {
+        "title": "Track",
+        "dur": "03:20",
+        "streamtype": "audio",
+        "by": "tester",
+        "user_id": 1,
+        "chat_id": chat_id,
+        "file": path,
+        "vidid": "telegram",
+        "seconds": 200,
+    }
+    return {
+        "_id": chat_id,
+        "queue": [track],
+        "played": played,
+        "video": False,
+        "loop": 0,
+        "updated": updated,
+    }
+
+
+def close(chat_id: int, path: str):
+    sessions.close(chat_id)
+    refs.pop(path, None)
+    persist._written.pop(chat_id, None)
+
+
+def test_claim():
+    async def run():
+        clock = FakeClock()
+        store = FakeCollection()
+        old = Handoff(store, clock, clock.sleep)
+        new = Handoff(store, clock, clock.sleep)
+        await old.request()
+        marker = await new.pending(TIMEOUT)
+        assert marker["state"] == "requested"
+        await new.complete(3)
+        assert store.docs[MARKER]["state"] == "taken"
+        # A second process finds the marker already claimed.
+        assert await Handoff(store, clock).pending(TIMEOUT) is None
+
+    asyncio.run(run())
+
+
+def test_takeover_at_saved_offset(tmp_path):
+    chat_id = -1001
+    path = tmp_path / "track.mp3"
+    path.write_bytes(b"")
+    path = str(path)
+
+    async def run():
+        clock = FakeClock()
+        queues = FakeCollection([saved_queue(chat_id, path, 40, clock.now - 5)])
+        calls = FakeCalls()
+        resumed = await persist.restore(True, calls, queues, clock)
+        assert resumed == 1
+        # The old process kept playing for the 5 seconds since its last save.
+        assert calls.joined[chat_id] == (path, 45, False)
+        assert sessions.get(chat_id).queue[0]["played"] == 45
+        assert refs[path] == 1
+
+    try:
+        asyncio.run(run())
+    finally:
+        close(chat_id, path)
+
+
+def test_drain(tmp_path):
+    chat_id = -1002
+    path = tmp_path / "track.mp3"
+    path.write_bytes(b"")
+    path = str(path)
+
+    async def new_process(store, queues, clock, calls):
+        marker = Handoff(store, clock, clock.sleep)
+        if await marker.pending(TIMEOUT):
+            await marker.complete(await persist.restore(True, calls, queues, clock))
+
+    async def run():
+        clock = FakeClock()
+        store = FakeCollection()
+        queues = FakeCollection([saved_queue(chat_id, path, 10, clock.now)])
+        calls = FakeCalls()
+        old = Handoff(store, clock, clock.sleep)
+        await old.request()
+        assert old.draining
+        # The new process comes up 3 seconds after the last save.
+        started = FakeClock(clock.now + 3)
+        taken, _ = await asyncio.gather(
+            old.wait(TIMEOUT), new_process(store, queues, started, calls)
+        )
+        assert taken["resumed"] == 1
+        assert calls.joined[chat_id][1] == 13
+        # The old process keeps draining until it exits.
+        assert old.draining
+        assert MARKER not in store.docs
+
+    try:
+        asyncio.run(run())
+    finally:
+        close(chat_id, path)
+
+
+def test_timeout():
+    async def run():
+        clock = FakeClock()
+        store = FakeCollection()
+        old = Handoff(store, clock, clock.sleep)
+        await old.request()
+        assert await old.wait(TIMEOUT) is None
+        assert clock.now >= 1000.0 + TIMEOUT
+        # A process starting after the deadline does a cold start.
+        await clock.sleep(1)
+        assert await Handoff(store, clock).pending(TIMEOUT) is None
+        await old.cancel()
+        assert not old.draining
+        assert MARKER not in store.docs
+
+    asyncio.run(run())